@@ -1,21 +1,105 @@
+from django import forms
 from django.contrib import admin
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.contrib.auth import get_user_model
+from django.db import connections
+from django.db.models import Q, Value
+from django.db.models.functions import Concat, Lower
+from django.utils.text import smart_split, unescape_string_literal
 
-from .models import Category, Location, Post, Comment
+from .models import (Category, Comment, CommentSearch, Location, Post,
+                     PostSearch)
+from .paginators import EstimatedCountPaginator
+from .search import build_match_query
+
+
+class AutocompleteFilter(admin.FieldListFilter):
+    """Фильтр по внешнему ключу с автодополнением вместо списка.
+
+    Стандартный RelatedFieldListFilter выводит в боковую панель все
+    связанные объекты. Здесь выводится только выбранный, а варианты
+    подгружает виджет автодополнения админки; у админки связанной
+    модели должны быть заданы search_fields.
+    """
+
+    template = 'admin/blog/autocomplete_filter.html'
+
+    def __init__(self, field, request, params, model, model_admin,
+                 field_path):
+        self.lookup_kwarg = f'{field_path}__{field.target_field.name}__exact'
+        super().__init__(
+            field, request, params, model, model_admin, field_path
+        )
+        # Поле формы даёт виджету выборку для подписи выбранного объекта.
+        self.widget = field.formfield(
+            widget=AutocompleteSelect(field, model_admin.admin_site),
+            required=False,
+        ).widget
+
+    def expected_parameters(self):
+        return [self.lookup_kwarg]
+
+    def get_facet_counts(self, pk_attname, filtered_qs):
+        return {}
+
+    def choices(self, changelist):
+        selected = self.used_parameters.get(self.lookup_kwarg)
+        self.rendered_widget = self.widget.render(
+            self.lookup_kwarg,
+            selected[-1] if selected else None,
+            attrs={
+                'data-query-string': changelist.get_query_string(
+                    remove=[self.lookup_kwarg, 'p']
+                ),
+            },
+        )
+        yield {
+            'selected': not selected,
+            'query_string': changelist.get_query_string(
+                remove=[self.lookup_kwarg]
+            ),
+            'display': 'Все',
+        }
+
+
+class AutocompleteFilterMedia:
+    """Подключает скрипты автодополнения для AutocompleteFilter."""
+
+    @property
+    def media(self):
+        media = super().media + forms.Media(js=['js/autocomplete_filter.js'])
+        for list_filter in self.list_filter:
+            if isinstance(list_filter, tuple) and issubclass(
+                list_filter[1], AutocompleteFilter
+            ):
+                field = self.model._meta.get_field(list_filter[0])
+                media += AutocompleteSelect(field, self.admin_site).media
+        return media
+
+
+class EstimatedCountMixin:
+    """Список без второго COUNT(*) и с оценкой числа строк."""
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
     list_display = ('title', 'is_published', 'created_at')
     prepopulated_fields = {'slug': ('title',)}
+    search_fields = ('title',)
 
 
 @admin.register(Location)
 class LocationAdmin(admin.ModelAdmin):
     list_display = ('name', 'is_published', 'created_at')
+    search_fields = ('name',)
 
 
 @admin.register(Post)
-class PostAdmin(admin.ModelAdmin):
+class PostAdmin(EstimatedCountMixin, AutocompleteFilterMedia,
+                admin.ModelAdmin):
     list_display = (
         'title',
         'is_published',
@@ -24,16 +108,71 @@ class PostAdmin(admin.ModelAdmin):
         'location',
         'author',
         'pub_date')
-    list_filter = ('is_published', 'location', 'category')
+    list_select_related = ('category', 'location', 'author')
+    list_filter = (
+        'is_published',
+        ('location', AutocompleteFilter),
+        ('category', AutocompleteFilter),
+    )
+    search_fields = ('title',)
+    # Порядок нужен и автодополнению, которое постранично выдаёт посты.
+    ordering = ('-pk',)
+    autocomplete_fields = ('author', 'category', 'location')
     date_hierarchy = 'pub_date'
 
 
 @admin.register(Comment)
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(EstimatedCountMixin, AutocompleteFilterMedia,
+                   admin.ModelAdmin):
     list_display = ('author',
                     'post',
                     'text',
                     'created_at')
-    list_filter = ('post', 'author')
+    list_select_related = ('post', 'author')
+    list_filter = (
+        ('post', AutocompleteFilter),
+        ('author', AutocompleteFilter),
+    )
     search_fields = ('text', 'author__username', 'post__title')
     date_hierarchy = 'created_at'
+
+    def get_search_results(self, request, queryset, search_term):
+        """Поиск по индексам вместо LIKE '%...%' по трём таблицам.
+
+        Каждое слово запроса ищется по словам текста комментария
+        и заголовка поста (индексы FTS5, по началу слова) и по началу
+        имени автора без учёта регистра (диапазон по индексу
+        USERNAME_LOWER_INDEX).
+        Точные значения находятся так же, как стандартным поиском.
+        """
+        if connections[queryset.db].vendor != 'sqlite':
+            return super().get_search_results(
+                request, queryset, search_term
+            )
+        for bit in smart_split(search_term):
+            if bit[0] in ('"', "'") and bit[0] == bit[-1]:
+                bit = unescape_string_literal(bit)
+            queryset = queryset.filter(self.get_term_condition(bit))
+        return queryset, False
+
+    @staticmethod
+    def get_term_condition(term):
+        # Регистр приводит база, как при поиске через icontains,
+        # а диапазон по lower(username) идёт по USERNAME_LOWER_INDEX.
+        lower_term = Lower(Value(term))
+        authors = get_user_model().objects.annotate(
+            lower_username=Lower('username')
+        ).filter(
+            lower_username__gte=lower_term,
+            lower_username__lt=Concat(lower_term, Value(chr(0x10FFFF))),
+        )
+        condition = Q(author__in=authors.values('pk'))
+        text_match = build_match_query(term)
+        if text_match:
+            condition |= Q(pk__in=CommentSearch.objects.filter(
+                document__match=text_match
+            ).values('pk'))
+            condition |= Q(post__in=PostSearch.objects.filter(
+                document__match=build_match_query(term, 'title')
+            ).values('pk'))
+        return condition
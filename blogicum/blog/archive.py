@@ -0,0 +1,131 @@
+import datetime
+
+from django.db import transaction
+from django.db.models import (Count, F, IntegerField, Max, Min, Sum,
+                              Value)
+from django.db.models.functions import (ExtractMonth, ExtractYear, Greatest,
+                                        TruncDate)
+from django.utils import timezone
+
+from .models import CalendarDay, Comment, Post
+
+# Модель и поле даты для каждого вида счётчика календаря
+CALENDAR_SOURCES = {
+    CalendarDay.POSTS: (Post, 'pub_date'),
+    CalendarDay.COMMENTS: (Comment, 'created_at'),
+}
+
+
+def to_day(value):
+    """День даты в текущем часовом поясе, как в навигации админки."""
+    if timezone.is_aware(value):
+        value = timezone.localtime(value)
+    return value.date()
+
+
+def _subtract_from_day(kind, day, amount):
+    # Строки дня может не быть, а счётчик — разойтись с таблицей
+    # после loaddata и bulk_create, которые минуют сигналы.
+    CalendarDay.objects.filter(kind=kind, day=day).update(
+        count=Greatest(F('count') - amount, 0)
+    )
+
+
+def _count_by_day(queryset, field):
+    return (
+        queryset.annotate(
+            day=TruncDate(field, tzinfo=timezone.get_current_timezone())
+        )
+        .values('day')
+        .annotate(total=Count('pk'))
+        .order_by()
+    )
+
+
+def shift_calendar_day(kind, value, delta):
+    """Меняет счётчик дня даты value на delta."""
+    day = to_day(value)
+    if delta < 0:
+        _subtract_from_day(kind, day, -delta)
+        return
+    with transaction.atomic():
+        CalendarDay.objects.bulk_create(
+            [CalendarDay(kind=kind, day=day)], ignore_conflicts=True
+        )
+        CalendarDay.objects.filter(kind=kind, day=day).update(
+            count=F('count') + delta
+        )
+
+
+def uncount_calendar_days(kind, queryset):
+    """Вычитает из календаря записи queryset, по запросу на каждый день.
+
+    Так учитываются каскадные удаления вместо сигнала на каждую запись.
+    """
+    _, field = CALENDAR_SOURCES[kind]
+    for row in _count_by_day(queryset, field):
+        _subtract_from_day(kind, row['day'], row['total'])
+
+
+def rebuild_calendar(kinds=tuple(CALENDAR_SOURCES)):
+    """Пересчитывает календарь по исходным таблицам.
+
+    Группировка по дням проходит таблицу целиком, поэтому это команда
+    обслуживания, а не часть обработки запросов.
+    """
+    totals = {}
+    for kind in kinds:
+        model, field = CALENDAR_SOURCES[kind]
+        rows = _count_by_day(model.objects.all(), field)
+        with transaction.atomic():
+            CalendarDay.objects.filter(kind=kind).delete()
+            CalendarDay.objects.bulk_create(
+                CalendarDay(kind=kind, day=row['day'], count=row['total'])
+                for row in rows.iterator()
+            )
+        totals[kind] = CalendarDay.objects.filter(kind=kind).count()
+    return totals
+
+
+def get_calendar_days(kind):
+    return CalendarDay.objects.filter(kind=kind, count__gt=0)
+
+
+def get_calendar_range(kind):
+    """Первый и последний дни, за которые есть записи."""
+    bounds = get_calendar_days(kind).aggregate(
+        first=Min('day'), last=Max('day')
+    )
+    return bounds['first'], bounds['last']
+
+
+def get_calendar(kind, year=None, month=None):
+    """Даты с числом записей: годы, месяцы года или дни месяца.
+
+    Возвращает список пар (дата, количество) по возрастанию; для годов
+    и месяцев дата — их первый день.
+    """
+    days = get_calendar_days(kind)
+    if year is not None and month is not None:
+        return list(
+            days.filter(day__year=year, day__month=month)
+            .order_by('day')
+            .values_list('day', 'count')
+        )
+    if year is None:
+        periods = days.annotate(
+            year=ExtractYear('day'), month=Value(1, IntegerField())
+        )
+    else:
+        periods = days.filter(day__year=year).annotate(
+            year=ExtractYear('day'), month=ExtractMonth('day')
+        )
+    rows = (
+        periods.values('year', 'month')
+        .annotate(total=Sum('count'))
+        .order_by('year', 'month')
+    )
+    return [
+        (datetime.date(row['year'], row['month'], 1), row['total'])
+        for row in rows
+    ]
@@ -0,0 +1,78 @@
+import hashlib
+
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from .constants import POST_CARD_CACHE_TIMEOUT
+
+# Шаблон карточки поста в лентах, профиле и поиске
+POST_CARD_TEMPLATE = 'includes/post_card.html'
+
+# Меняется вместе с разметкой карточки, чтобы не отдавать старые
+POST_CARD_VERSION = 1
+
+
+def get_feed_count_key(*parts):
+    """Ключ кеша с числом постов ленты, например ('category', 5)."""
+    return 'feed_count:' + ':'.join(str(part) for part in parts)
+
+
+def invalidate_feed_counts(category_ids=(), author_ids=()):
+    """Сбрасывает закешированные размеры лент.
+
+    Главная лента сбрасывается всегда, ленты категорий и авторов —
+    только для переданных идентификаторов.
+    """
+    keys = [get_feed_count_key('index')]
+    keys += [
+        get_feed_count_key('category', pk) for pk in category_ids if pk
+    ]
+    for pk in author_ids:
+        keys += [
+            get_feed_count_key('author', pk),
+            get_feed_count_key('author', pk, 'all'),
+        ]
+    cache.delete_many(keys)
+
+
+def get_post_card_version(post):
+    """Версия карточки поста: хеш всех данных, которые в ней выводятся.
+
+    Меняется при правке поста, его категории, местоположения,
+    имени автора и числа комментариев, поэтому сбрасывать старые
+    карточки не нужно: они перестают запрашиваться и истекают сами.
+    """
+    location = post.location
+    data = (
+        post.title, post.excerpt, post.pub_date.isoformat(),
+        post.image.name or '', post.image_variants,
+        post.comment_count, post.is_published,
+        post.author.username,
+        post.category.slug, post.category.title, post.category.is_published,
+        location and (location.name, location.is_published),
+    )
+    return hashlib.md5(
+        repr(data).encode(), usedforsecurity=False
+    ).hexdigest()
+
+
+def get_post_card_key(post):
+    return (
+        f'post_card:{POST_CARD_VERSION}:{post.pk}:'
+        f'{get_post_card_version(post)}'
+    )
+
+
+def render_post_cards(posts):
+    """HTML карточек постов; кеш читается и пишется одним запросом."""
+    keys = [get_post_card_key(post) for post in posts]
+    cards = cache.get_many(keys)
+    missing = {
+        key: render_to_string(POST_CARD_TEMPLATE, {'post': post})
+        for key, post in zip(keys, posts) if key not in cards
+    }
+    if missing:
+        cache.set_many(missing, POST_CARD_CACHE_TIMEOUT)
+        cards.update(missing)
+    return [mark_safe(cards[key]) for key in keys]
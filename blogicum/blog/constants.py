@@ -10,3 +10,67 @@ MAX_LENGTH_NAME = 15
 
 # Количество постов на странице профиля
 POSTS_PER_PAGE = 10
+
+# Сколько постов обрабатывается за раз при пересчёте счётчиков
+COUNT_CHUNK_SIZE = 1000
+
+# Сколько слов текста поста показывается в карточке ленты
+CARD_TEXT_WORDS = 10
+
+# Сколько постов обрабатывается за раз при пересборке ленты
+FEED_CHUNK_SIZE = 500
+
+# Сколько секунд хранится в кеше момент ближайшей отложенной публикации
+NEXT_ACTIVATION_CACHE_TIMEOUT = 300
+
+# Сколько комментариев выводится на странице поста за раз
+COMMENTS_PER_PAGE = 50
+
+# Сколько объектов каждой модели вставляется за раз при загрузке дампа
+LOAD_BATCH_SIZE = 1000
+
+# Сколько строк читается из базы за раз при выгрузке дампа
+EXPORT_CHUNK_SIZE = 2000
+
+# Сколько секунд хранится в кеше точное число строк списка админки
+ADMIN_COUNT_CACHE_TIMEOUT = 60
+
+# С какого числа строк по статистике БД список админки без фильтров
+# показывает оценку вместо точного COUNT(*)
+ADMIN_COUNT_ESTIMATE_THRESHOLD = 10000
+
+# Сколько секунд хранится в кеше отрисованная карточка поста
+POST_CARD_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Сколько соседних номеров страниц показывается рядом с текущей
+# и у краёв списка страниц
+PAGE_RANGE_ON_EACH_SIDE = 2
+PAGE_RANGE_ON_ENDS = 1
+
+# Дальше этой страницы OFFSET не используется: глубокие страницы
+# открываются по курсору
+MAX_OFFSET_PAGE = 100
+
+# Ширина уменьшенных копий изображения поста: для карточки в ленте,
+# для страницы поста и для экранов с двойной плотностью пикселей
+IMAGE_VARIANT_WIDTHS = {'card': 640, 'detail': 960, '2x': 1920}
+
+# Качество JPEG уменьшенных копий
+IMAGE_VARIANT_QUALITY = 85
+
+# Сколько первых байтов загружаемого изображения хранится в памяти,
+# чтобы прочитать из заголовка его размеры
+IMAGE_HEADER_MAX_BYTES = 128 * 1024
+
+# Сколько секунд обработчик фоновых задач ждёт новых задач
+JOB_POLL_INTERVAL = 1.0
+
+# Сколько раз задача запускается, прежде чем считается проваленной
+JOB_MAX_ATTEMPTS = 3
+
+# Через сколько секунд выполняемая задача считается брошенной
+# упавшим обработчиком и возвращается в очередь
+JOB_STALE_TIMEOUT = 600
+
+# За сколько последних секунд считаются метрики фоновых задач
+JOB_METRICS_WINDOW = 3600
@@ -0,0 +1,283 @@
+import gzip
+import json
+import re
+from contextlib import contextmanager
+
+from django.core.cache import cache
+from django.core.management.color import no_style
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.serializers.python import Deserializer, Serializer
+from django.db import connection, transaction
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from .archive import rebuild_calendar
+from .caching import invalidate_feed_counts
+from .constants import EXPORT_CHUNK_SIZE, LOAD_BATCH_SIZE
+from .feed import NEXT_ACTIVATION_KEY, rebuild_feed
+from .models import Category, Comment, Location, Post, User
+from .utils import get_comment_count_subquery
+
+# Сколько символов дампа читается из файла за раз
+READ_SIZE = 64 * 1024
+
+WHITESPACE = re.compile(r'\s*')
+
+# Этапы загрузки в порядке зависимостей: модели этапа ссылаются
+# только на модели предыдущих этапов.
+LOAD_STAGES = ((User, Category, Location), (Post,), (Comment,))
+
+# Модели, которые выгружает export_dump
+EXPORT_MODELS = (Post, Comment)
+
+
+def open_dump(path, mode='rt'):
+    """Открывает дамп; файлы *.gz читаются и пишутся через gzip."""
+    if str(path).endswith('.gz'):
+        return gzip.open(path, mode, encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+def is_jsonl(path):
+    """JSON Lines: по одному объекту на строку."""
+    return str(path).removesuffix('.gz').endswith(('.jsonl', '.ndjson'))
+
+
+class StreamBuffer:
+    """Буфер над текстовым потоком, который читается блоками READ_SIZE."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.text = ''
+        self.position = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def read_more(self):
+        chunk = self.stream.read(READ_SIZE)
+        self.eof = not chunk
+        self.text = self.text[self.position:] + chunk
+        self.position = 0
+
+    def peek(self):
+        """Следующий значимый символ или '' в конце потока."""
+        while True:
+            self.position = WHITESPACE.match(self.text, self.position).end()
+            if self.position < len(self.text) or self.eof:
+                return self.text[self.position:self.position + 1]
+            self.read_more()
+
+    def take(self):
+        char = self.peek()
+        self.position += 1
+        return char
+
+    def decode(self):
+        """Разбирает следующее JSON-значение, дочитывая поток по мере нужды."""
+        self.peek()
+        while True:
+            try:
+                value, self.position = self.decoder.raw_decode(
+                    self.text, self.position
+                )
+                return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+                self.read_more()
+
+
+def iter_json_array(stream):
+    """Потоковый разбор JSON-массива объектов.
+
+    Элементы отдаются по одному, весь массив в память не загружается.
+    """
+    buffer = StreamBuffer(stream)
+    if buffer.take() != '[':
+        raise ValueError('Дамп должен быть JSON-массивом объектов.')
+    if buffer.peek() == ']':
+        return
+    while True:
+        yield buffer.decode()
+        char = buffer.take()
+        if char == ']':
+            return
+        if char != ',':
+            raise ValueError(
+                f'Ожидается «,» или «]» после объекта, получено {char!r}.'
+            )
+
+
+def iter_jsonl(stream):
+    for line in stream:
+        if line.strip():
+            yield json.loads(line)
+
+
+def iter_dump_records(stream, jsonl=False):
+    return iter_jsonl(stream) if jsonl else iter_json_array(stream)
+
+
+@contextmanager
+def keep_auto_now_add(model):
+    """Сохраняет даты создания из дампа: bulk_create иначе ставит now()."""
+    fields = [
+        field for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now_add', False)
+    ]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+class DumpLoader:
+    """Пакетная загрузка дампов в формате фикстур Django.
+
+    Файлы читаются потоково по одному разу на каждый этап LOAD_STAGES,
+    поэтому порядок объектов в дампе не важен, а память не растёт
+    с размером файла. Объекты вставляются через bulk_create пачками
+    по batch_size, каждая пачка — в своей транзакции. Сигналы
+    не вызываются: производные поля постов и комментариев заполняются
+    здесь, а лента пересобирается в finish().
+    """
+
+    def __init__(self, batch_size=LOAD_BATCH_SIZE):
+        self.batch_size = batch_size
+        self.counts = {model: 0 for stage in LOAD_STAGES for model in stage}
+        self.labels = {model._meta.label_lower for model in self.counts}
+        self.skipped = 0
+        self.category_ids = set()
+        self.author_ids = set()
+
+    def load_files(self, paths):
+        for number, stage in enumerate(LOAD_STAGES):
+            for path in paths:
+                with open_dump(path) as stream:
+                    records = iter_dump_records(stream, is_jsonl(path))
+                    self.load(records, stage, count_skipped=not number)
+        self.finish()
+
+    def load(self, records, models, count_skipped=False):
+        """Загружает записи указанных моделей, остальные пропускает."""
+        labels = {model._meta.label_lower for model in models}
+        buffers = {model: [] for model in models}
+        selected = self._select(records, labels, count_skipped)
+        for deserialized in Deserializer(selected):
+            obj = deserialized.object
+            buffer = buffers[type(obj)]
+            buffer.append(obj)
+            if len(buffer) >= self.batch_size:
+                self._insert(type(obj), buffer)
+                buffer.clear()
+        for model, buffer in buffers.items():
+            if buffer:
+                self._insert(model, buffer)
+
+    def _select(self, records, labels, count_skipped):
+        for record in records:
+            label = record.get('model', '').lower()
+            if label in labels:
+                yield record
+            elif count_skipped and label not in self.labels:
+                self.skipped += 1
+
+    @transaction.atomic
+    def _insert(self, model, objs):
+        if model is Post:
+            for post in objs:
+                post.excerpt = post.get_excerpt()
+                post.render_text_html()
+                post.comment_count = 0
+                post.is_visible = False
+        elif model is Comment:
+            for comment in objs:
+                comment.render_text_html()
+        with keep_auto_now_add(model):
+            model.objects.bulk_create(objs)
+        self.counts[model] += len(objs)
+        if model is Post:
+            Post.objects.filter(
+                pk__in=[post.pk for post in objs],
+                is_published=True,
+                pub_date__lte=timezone.now(),
+                category__is_published=True,
+            ).update(is_visible=True)
+            self.category_ids.update(post.category_id for post in objs)
+            self.author_ids.update(post.author_id for post in objs)
+        elif model is Comment:
+            Post.objects.filter(
+                pk__in={comment.post_id for comment in objs}
+            ).update(comment_count=get_comment_count_subquery())
+
+    def finish(self):
+        """Приводит в порядок данные, которые обычно обновляют сигналы."""
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(
+                no_style(), list(self.counts)
+            ):
+                cursor.execute(sql)
+        rebuild_feed()
+        rebuild_calendar()
+        invalidate_feed_counts(self.category_ids, self.author_ids)
+        cache.delete(NEXT_ACTIVATION_KEY)
+
+
+def get_export_queryset(model, since=None):
+    queryset = model.objects.order_by('pk')
+    if since is not None:
+        queryset = queryset.filter(created_at__gte=since)
+    return queryset
+
+
+def get_pk_ranges(queryset, parts):
+    """Делит диапазон pk выборки на parts отрезков [first, last]."""
+    bounds = queryset.aggregate(first=Min('pk'), last=Max('pk'))
+    first, last = bounds['first'], bounds['last']
+    if first is None:
+        return []
+    step = max(1, -(-(last - first + 1) // parts))
+    return [
+        (start, min(start + step - 1, last))
+        for start in range(first, last + 1, step)
+    ]
+
+
+def export_range(label, first, last, path, since=None,
+                 chunk_size=EXPORT_CHUNK_SIZE):
+    """Пишет объекты модели с pk из [first, last] в JSONL-файл.
+
+    Записи читаются итератором пачками по chunk_size и сразу пишутся
+    в файл в формате фикстур, который понимает load_dump. Функция
+    запускается и в отдельных процессах, поэтому модель передаётся
+    меткой. Возвращает число выгруженных объектов.
+    """
+    model = next(
+        model for model in EXPORT_MODELS if model._meta.label_lower == label
+    )
+    queryset = get_export_queryset(model, since).filter(
+        pk__gte=first, pk__lte=last
+    )
+    serializer = Serializer()
+    count = 0
+    batch = []
+    with open_dump(path, 'wt') as stream:
+        for obj in queryset.iterator(chunk_size=chunk_size):
+            batch.append(obj)
+            if len(batch) >= chunk_size:
+                count += _write_records(stream, serializer, batch)
+                batch = []
+        count += _write_records(stream, serializer, batch)
+    return count
+
+
+def _write_records(stream, serializer, objs):
+    for record in serializer.serialize(objs):
+        stream.write(
+            json.dumps(record, cls=DjangoJSONEncoder, ensure_ascii=False)
+        )
+        stream.write('\n')
+    return len(objs)
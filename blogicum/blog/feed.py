@@ -0,0 +1,218 @@
+from datetime import datetime, timezone as dt_timezone
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Min
+from django.utils import timezone
+
+from .caching import invalidate_feed_counts
+from .constants import FEED_CHUNK_SIZE, NEXT_ACTIVATION_CACHE_TIMEOUT
+from .models import FeedEntry, Post
+
+# Ключ кеша с моментом ближайшей отложенной публикации
+NEXT_ACTIVATION_KEY = 'feed:next_activation'
+
+# Поля записи ленты, которые сверяет check_feed
+FEED_ENTRY_FIELDS = (
+    'title', 'excerpt', 'pub_date', 'image', 'image_variants',
+    'comment_count',
+    'author_id', 'author_username',
+    'category_id', 'category_title', 'category_slug',
+    'location_id', 'location_name', 'location_is_published',
+)
+
+
+def get_feed_posts():
+    """Посты, которые должны быть в материализованной ленте."""
+    return Post.objects.select_related(
+        'author', 'category', 'location'
+    ).defer('text').filter(is_visible=True)
+
+
+def get_feed_entry_values(post):
+    """Данные карточки поста для записи ленты."""
+    return {
+        'title': post.title,
+        'excerpt': post.excerpt,
+        'pub_date': post.pub_date,
+        'image': post.image.name or '',
+        'image_variants': post.image_variants,
+        'comment_count': post.comment_count,
+        'author_id': post.author_id,
+        'author_username': post.author.username,
+        'category_id': post.category_id,
+        'category_title': post.category.title,
+        'category_slug': post.category.slug,
+        'location_id': post.location_id,
+        'location_name': post.location.name if post.location else '',
+        'location_is_published': bool(
+            post.location and post.location.is_published
+        ),
+    }
+
+
+def sync_feed_entries(post_ids):
+    """Приводит записи ленты указанных постов к состоянию в базе."""
+    post_ids = list(post_ids)
+    posts = list(get_feed_posts().filter(pk__in=post_ids))
+    with transaction.atomic():
+        FeedEntry.objects.filter(pk__in=post_ids).exclude(
+            pk__in=[post.pk for post in posts]
+        ).delete()
+        for post in posts:
+            FeedEntry.objects.update_or_create(
+                post_id=post.pk, defaults=get_feed_entry_values(post)
+            )
+
+
+def iter_chunks(queryset, chunk_size):
+    """Объекты queryset списками по chunk_size в порядке pk.
+
+    Следующая порция выбирается по последнему pk, а не смещением,
+    поэтому каждая порция — один запрос по индексу.
+    """
+    last_pk = 0
+    while True:
+        chunk = list(queryset.filter(pk__gt=last_pk).order_by('pk')[
+            :chunk_size])
+        if not chunk:
+            return
+        last_pk = chunk[-1].pk
+        yield chunk
+
+
+def _create_entries(posts):
+    FeedEntry.objects.bulk_create(
+        FeedEntry(post_id=post.pk, **get_feed_entry_values(post))
+        for post in posts
+    )
+
+
+def rebuild_feed(chunk_size=FEED_CHUNK_SIZE):
+    """Полностью пересобирает ленту; возвращает число записей."""
+    total = 0
+    with transaction.atomic():
+        FeedEntry.objects.all().delete()
+        for chunk in iter_chunks(get_feed_posts(), chunk_size):
+            _create_entries(chunk)
+            total += len(chunk)
+    return total
+
+
+def check_feed(chunk_size=FEED_CHUNK_SIZE):
+    """Сверяет ленту с постами.
+
+    Возвращает словарь с идентификаторами недостающих (missing),
+    лишних (extra) и устаревших (stale) записей.
+    """
+    report = {'missing': [], 'extra': [], 'stale': []}
+    expected_ids = set()
+    for chunk in iter_chunks(get_feed_posts(), chunk_size):
+        entries = FeedEntry.objects.in_bulk([post.pk for post in chunk])
+        for post in chunk:
+            expected_ids.add(post.pk)
+            entry = entries.get(post.pk)
+            if entry is None:
+                report['missing'].append(post.pk)
+                continue
+            values = get_feed_entry_values(post)
+            if any(
+                getattr(entry, field) != values[field]
+                for field in FEED_ENTRY_FIELDS
+            ):
+                report['stale'].append(post.pk)
+    for chunk in iter_chunks(FeedEntry.objects.only('pk'), chunk_size):
+        report['extra'].extend(
+            entry.pk for entry in chunk if entry.pk not in expected_ids
+        )
+    return report
+
+
+def refresh_category_visibility(category):
+    """Пересчитывает видимость постов после (снятия с) публикации категории."""
+    posts = Post.objects.filter(category=category)
+    with transaction.atomic():
+        if category.is_published:
+            posts.filter(
+                is_published=True, pub_date__lte=timezone.now()
+            ).update(is_visible=True)
+        else:
+            posts.update(is_visible=False)
+        FeedEntry.objects.filter(category=category).delete()
+        for chunk in iter_chunks(
+            get_feed_posts().filter(category=category), FEED_CHUNK_SIZE
+        ):
+            _create_entries(chunk)
+    cache.delete(NEXT_ACTIVATION_KEY)
+
+
+def get_scheduled_posts():
+    """Опубликованные посты, которые ещё не видны в лентах."""
+    return Post.objects.filter(
+        is_visible=False, is_published=True, category__is_published=True
+    )
+
+
+def activate_scheduled_posts(now=None):
+    """Показывает в лентах посты, чья дата публикации наступила.
+
+    Возвращает идентификаторы включённых постов. Обновление идёт мимо
+    сигналов, поэтому страницы лент и постов сбрасываются здесь.
+    """
+    # pagecache сам импортирует feed.
+    from .pagecache import page_tag, purge_page_tags
+
+    now = now or timezone.now()
+    activated = []
+    while True:
+        due = list(
+            get_scheduled_posts().filter(pub_date__lte=now)
+            .order_by('pub_date')
+            .values_list('pk', 'category_id', 'author_id')[:FEED_CHUNK_SIZE]
+        )
+        if not due:
+            break
+        ids = [pk for pk, _, _ in due]
+        with transaction.atomic():
+            Post.objects.filter(pk__in=ids).update(is_visible=True)
+            sync_feed_entries(ids)
+        category_ids = {category_id for _, category_id, _ in due}
+        author_ids = {author_id for _, _, author_id in due}
+        invalidate_feed_counts(
+            category_ids=category_ids, author_ids=author_ids
+        )
+        purge_page_tags(
+            page_tag('feed'),
+            *(page_tag('category_feed', pk) for pk in category_ids),
+            *(page_tag('author_feed', pk) for pk in author_ids),
+            *(page_tag('post', pk) for pk in ids),
+        )
+        activated += ids
+    cache.delete(NEXT_ACTIVATION_KEY)
+    return activated
+
+
+def get_next_activation():
+    """Момент ближайшей отложенной публикации или None."""
+    timestamp = cache.get(NEXT_ACTIVATION_KEY)
+    if timestamp is None:
+        next_date = get_scheduled_posts().aggregate(
+            next_date=Min('pub_date')
+        )['next_date']
+        # 0 означает, что отложенных постов нет.
+        timestamp = next_date.timestamp() if next_date else 0
+        cache.set(
+            NEXT_ACTIVATION_KEY, timestamp, NEXT_ACTIVATION_CACHE_TIMEOUT
+        )
+    if not timestamp:
+        return None
+    return datetime.fromtimestamp(timestamp, tz=dt_timezone.utc)
+
+
+def get_feed_cache_timeout(timeout):
+    """Ограничивает время жизни кеша ленты ближайшей публикацией."""
+    next_activation = get_next_activation()
+    if next_activation is None:
+        return timeout
+    seconds = (next_activation - timezone.now()).total_seconds()
+    return max(0, min(timeout, int(seconds) + 1))
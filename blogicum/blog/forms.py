@@ -19,6 +19,17 @@ class PostForm(forms.ModelForm):
             'text': forms.Textarea(),
         }
 
+    def __init__(self, *args, upload_errors=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Файлы, отброшенные при загрузке, см. ImageUploadHandler
+        self.upload_errors = upload_errors or {}
+
+    def clean(self):
+        cleaned_data = super().clean()
+        for field, error in self.upload_errors.items():
+            self.add_error(field, error)
+        return cleaned_data
+
 
 class EditUserForm(forms.ModelForm):
     class Meta:
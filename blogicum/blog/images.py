@@ -0,0 +1,88 @@
+from io import BytesIO
+from pathlib import PurePosixPath
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+from .constants import IMAGE_VARIANT_QUALITY, IMAGE_VARIANT_WIDTHS
+
+# Копии, из которых браузер выбирает картинку карточки и страницы поста
+CARD_VARIANTS = ('card', 'detail', '2x')
+DETAIL_VARIANTS = ('detail', '2x')
+
+# Запись об оригинале у поста, копии которого построить не удалось
+ORIGINAL_VARIANT = 'original'
+
+
+def get_variant_name(name, variant, extension):
+    path = PurePosixPath(name)
+    return str(path.parent / 'variants' / f'{path.stem}_{variant}{extension}')
+
+
+def _encode(image, extension):
+    buffer = BytesIO()
+    if extension == '.png':
+        image.save(buffer, format='PNG', optimize=True)
+    else:
+        image.convert('RGB').save(
+            buffer, format='JPEG', quality=IMAGE_VARIANT_QUALITY,
+            optimize=True, progressive=True,
+        )
+    return ContentFile(buffer.getvalue())
+
+
+def make_image_variants(field_file):
+    """Сохраняет уменьшенные копии изображения рядом с оригиналом.
+
+    Возвращает словарь {копия: {'name': ..., 'width': ...}}. Копии
+    шире оригинала не создаются: вместо них указывается сам оригинал.
+    Картинки с прозрачностью сохраняются в PNG, остальные — в JPEG.
+    """
+    storage = field_file.storage
+    with field_file.open('rb'), Image.open(field_file) as original:
+        image = ImageOps.exif_transpose(original)
+        image.load()
+    has_alpha = image.mode in ('RGBA', 'LA') or 'transparency' in image.info
+    extension = '.png' if has_alpha else '.jpg'
+    variants = {}
+    for variant, width in IMAGE_VARIANT_WIDTHS.items():
+        if image.width <= width:
+            variants[variant] = {'name': field_file.name, 'width': image.width}
+            continue
+        height = max(1, round(image.height * width / image.width))
+        resized = image.resize((width, height), Image.Resampling.LANCZOS)
+        name = storage.save(
+            get_variant_name(field_file.name, variant, extension),
+            _encode(resized, extension),
+        )
+        variants[variant] = {'name': name, 'width': width}
+    return variants
+
+
+def get_original_variants(field_file):
+    """Копии поста, для которого их не удалось построить.
+
+    Непустой словарь убирает заглушку, а копий для srcset в нём нет,
+    поэтому карточка и страница поста выводят сам оригинал.
+    """
+    return {ORIGINAL_VARIANT: {'name': field_file.name}}
+
+
+def get_srcset(field_file, variants, names):
+    """Значение srcset из сохранённых копий, без повторов."""
+    candidates = {}
+    for variant in names:
+        if variant in variants:
+            candidate = variants[variant]
+            candidates.setdefault(candidate['name'], candidate['width'])
+    return ', '.join(
+        f'{field_file.storage.url(name)} {width}w'
+        for name, width in candidates.items()
+    )
+
+
+def get_variant_url(field_file, variants, variant):
+    """Адрес копии или оригинала, если копий ещё нет."""
+    if variant in variants:
+        return field_file.storage.url(variants[variant]['name'])
+    return field_file.url
@@ -0,0 +1,143 @@
+from datetime import timedelta
+
+from django.db.models import (Avg, Count, DurationField, ExpressionWrapper, F,
+                              Max)
+from django.utils import timezone
+
+from .constants import (JOB_MAX_ATTEMPTS, JOB_METRICS_WINDOW,
+                        JOB_STALE_TIMEOUT)
+from .images import get_original_variants, make_image_variants
+from .models import FeedEntry, Job, Post
+from .pagecache import page_tag, purge_page_tags
+
+# Вид задачи построения копий изображения поста
+IMAGE_VARIANTS_JOB = 'image_variants'
+
+
+def _update_post_image_variants(post_id, get_variants):
+    """Сохраняет в пост и ленту копии, построенные get_variants."""
+    post = Post.objects.filter(pk=post_id).only('pk', 'image').first()
+    if post is None or not post.image:
+        return
+    variants = get_variants(post.image)
+    Post.objects.filter(pk=post_id).update(
+        image_variants=variants, updated_at=timezone.now()
+    )
+    FeedEntry.objects.filter(pk=post_id).update(image_variants=variants)
+    purge_page_tags(page_tag('post', post_id))
+
+
+def save_post_image_variants(post_id):
+    """Строит копии изображения поста и сохраняет их в пост и ленту."""
+    _update_post_image_variants(post_id, make_image_variants)
+
+
+def show_post_original_image(post_id):
+    """Заменяет заглушку поста оригиналом, если копий не будет."""
+    _update_post_image_variants(post_id, get_original_variants)
+
+
+# Обработчики задач по их виду; параметры задачи передаются именованными
+JOB_HANDLERS = {
+    IMAGE_VARIANTS_JOB: save_post_image_variants,
+}
+
+# Вызываются с теми же параметрами, когда задача упала окончательно
+JOB_FAILURE_HANDLERS = {
+    IMAGE_VARIANTS_JOB: show_post_original_image,
+}
+
+
+def enqueue_job(kind, **payload):
+    return Job.objects.create(kind=kind, payload=payload)
+
+
+def requeue_stale_jobs():
+    """Возвращает в очередь задачи, брошенные упавшим обработчиком."""
+    return Job.objects.filter(
+        status=Job.RUNNING,
+        started_at__lt=timezone.now() - timedelta(seconds=JOB_STALE_TIMEOUT),
+    ).update(status=Job.QUEUED)
+
+
+def claim_jobs(limit):
+    """Забирает до limit задач из очереди и возвращает их pk.
+
+    Задача достаётся тому обработчику, чей UPDATE первым сменил её
+    состояние, поэтому несколько run_jobs могут работать с одной
+    очередью и без SELECT ... FOR UPDATE SKIP LOCKED.
+    """
+    candidates = Job.objects.filter(status=Job.QUEUED).order_by(
+        'created_at', 'pk'
+    ).values_list('pk', flat=True)[:limit]
+    claimed = []
+    for pk in candidates:
+        if Job.objects.filter(pk=pk, status=Job.QUEUED).update(
+            status=Job.RUNNING,
+            started_at=timezone.now(),
+            attempts=F('attempts') + 1,
+        ):
+            claimed.append(pk)
+    return claimed
+
+
+def run_job(pk):
+    """Выполняет задачу; запускается и в отдельных процессах.
+
+    Упавшая задача возвращается в очередь, пока не исчерпает
+    JOB_MAX_ATTEMPTS запусков. Возвращает итоговое состояние.
+    """
+    job = Job.objects.get(pk=pk)
+    try:
+        JOB_HANDLERS[job.kind](**job.payload)
+    except Exception as error:
+        status = Job.QUEUED if job.attempts < JOB_MAX_ATTEMPTS else Job.FAILED
+        Job.objects.filter(pk=pk).update(
+            status=status,
+            error=f'{type(error).__name__}: {error}',
+            finished_at=timezone.now() if status == Job.FAILED else None,
+        )
+        if status == Job.FAILED and job.kind in JOB_FAILURE_HANDLERS:
+            JOB_FAILURE_HANDLERS[job.kind](**job.payload)
+        return status
+    Job.objects.filter(pk=pk).update(
+        status=Job.DONE, error='', finished_at=timezone.now()
+    )
+    return Job.DONE
+
+
+def _duration(end, start):
+    return ExpressionWrapper(F(end) - F(start), output_field=DurationField())
+
+
+def get_job_metrics(window=JOB_METRICS_WINDOW):
+    """Размер очереди, пропускная способность и задержки задач.
+
+    Задержки и число выполненных задач считаются за последние window
+    секунд: ожидание — от постановки в очередь до последнего запуска,
+    полное время — до завершения.
+    """
+    by_status = dict(
+        Job.objects.order_by()
+        .values_list('status')
+        .annotate(total=Count('pk'))
+    )
+    finished = Job.objects.filter(
+        status=Job.DONE,
+        finished_at__gte=timezone.now() - timedelta(seconds=window),
+    ).aggregate(
+        done=Count('pk'),
+        wait=Avg(_duration('started_at', 'created_at')),
+        latency=Avg(_duration('finished_at', 'created_at')),
+        max_latency=Max(_duration('finished_at', 'created_at')),
+    )
+    return {
+        'queued': by_status.get(Job.QUEUED, 0),
+        'running': by_status.get(Job.RUNNING, 0),
+        'failed': by_status.get(Job.FAILED, 0),
+        'done': finished['done'],
+        'per_minute': finished['done'] * 60 / window,
+        'wait': finished['wait'],
+        'latency': finished['latency'],
+        'max_latency': finished['max_latency'],
+    }
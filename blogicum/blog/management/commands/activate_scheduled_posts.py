@@ -0,0 +1,47 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from blog.feed import activate_scheduled_posts, get_next_activation
+
+
+class Command(BaseCommand):
+    help = (
+        'Показывает в лентах отложенные посты, чья дата публикации '
+        'наступила. С --loop работает постоянно и просыпается к моменту '
+        'ближайшей публикации.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Работать в цикле, а не один раз.'
+        )
+        parser.add_argument(
+            '--max-sleep', type=float, default=60,
+            help=(
+                'Максимальная пауза между проверками в секундах: за это '
+                'время замечаются новые отложенные посты.'
+            )
+        )
+
+    def handle(self, *args, loop, max_sleep, **options):
+        while True:
+            activated = activate_scheduled_posts()
+            if activated:
+                self.stdout.write(
+                    f'Опубликовано отложенных постов: {len(activated)}.'
+                )
+            next_activation = get_next_activation()
+            if not loop:
+                if next_activation:
+                    self.stdout.write(
+                        f'Следующая публикация: {next_activation:%c}.'
+                    )
+                break
+            pause = max_sleep
+            if next_activation is not None:
+                seconds = (next_activation - timezone.now()).total_seconds()
+                pause = min(max_sleep, max(seconds, 0))
+            time.sleep(pause)
@@ -0,0 +1,111 @@
+import itertools
+import random
+import sqlite3
+import time
+
+from django.core.management.base import BaseCommand
+
+from blog.search import POST_SEARCH_INDEX, build_match_query
+
+SEARCH_TABLE = POST_SEARCH_INDEX.table
+
+LIKE_SQL = (
+    'SELECT id FROM blog_post WHERE is_visible'
+    ' AND (title LIKE ? OR text LIKE ?) ORDER BY id DESC LIMIT 10'
+)
+MATCH_SQL = (
+    f'SELECT p.id FROM {SEARCH_TABLE} AS s'
+    ' JOIN blog_post AS p ON p.id = s.rowid'
+    f' WHERE s.{SEARCH_TABLE} MATCH ? AND p.is_visible'
+    ' ORDER BY s.rank LIMIT 10'
+)
+LIKE_COUNT_SQL = (
+    'SELECT count(*) FROM blog_post WHERE is_visible'
+    ' AND (title LIKE ? OR text LIKE ?)'
+)
+MATCH_COUNT_SQL = (
+    f'SELECT count(*) FROM {SEARCH_TABLE} AS s'
+    ' JOIN blog_post AS p ON p.id = s.rowid'
+    f' WHERE s.{SEARCH_TABLE} MATCH ? AND p.is_visible'
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает поиск через индекс FTS5 с LIKE на синтетических'
+        ' постах во временной базе SQLite в памяти.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000)
+        parser.add_argument('--words', type=int, default=50_000,
+                            help='Размер словаря синтетических текстов.')
+        parser.add_argument('--repeat', type=int, default=5,
+                            help='Сколько раз выполнять каждый запрос.')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, rows, words, repeat, seed, **options):
+        rng = random.Random(seed)
+        vocabulary = [
+            ''.join(rng.choice('абвгдежзиклмнопрстуфхцчшэюя')
+                    for _ in range(rng.randint(4, 10)))
+            for _ in range(words)
+        ]
+        db = sqlite3.connect(':memory:')
+        db.execute(
+            'CREATE TABLE blog_post (id INTEGER PRIMARY KEY,'
+            ' title TEXT, text TEXT, is_visible INTEGER)'
+        )
+        started = time.perf_counter()
+        # Частоты слов по закону Ципфа, как в обычных текстах.
+        weights = list(itertools.accumulate(
+            1 / rank for rank in range(1, words + 1)
+        ))
+
+        def phrase(length):
+            return ' '.join(
+                rng.choices(vocabulary, cum_weights=weights, k=length)
+            )
+
+        batch = []
+        for pk in range(1, rows + 1):
+            batch.append((
+                pk,
+                phrase(5),
+                phrase(60),
+                rng.random() < 0.9,
+            ))
+            if len(batch) == 10_000 or pk == rows:
+                db.executemany(
+                    'INSERT INTO blog_post VALUES (?, ?, ?, ?)', batch)
+                batch = []
+        self.stdout.write(
+            f'Данные: {rows} постов за {time.perf_counter() - started:.1f} с'
+        )
+        started = time.perf_counter()
+        for sql in POST_SEARCH_INDEX.create_sql:
+            db.execute(sql)
+        db.execute(POST_SEARCH_INDEX.rebuild_sql)
+        db.commit()
+        self.stdout.write(
+            f'Индекс FTS5: {time.perf_counter() - started:.1f} с'
+        )
+        # Частое, среднее и редкое слово словаря.
+        for word in (vocabulary[0], vocabulary[words // 100],
+                     vocabulary[-1]):
+            like = (f'%{word}%',) * 2
+            match = (build_match_query(word),)
+            self.stdout.write(
+                f'«{word}»: LIKE {self.measure(db, LIKE_SQL, like, repeat)}'
+                f' / {self.measure(db, LIKE_COUNT_SQL, like, repeat)} мс,'
+                f' FTS5 {self.measure(db, MATCH_SQL, match, repeat)}'
+                f' / {self.measure(db, MATCH_COUNT_SQL, match, repeat)} мс'
+                ' (первые 10 / подсчёт всех)'
+            )
+
+    @staticmethod
+    def measure(db, sql, params, repeat):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            db.execute(sql, params).fetchall()
+        return f'{(time.perf_counter() - started) * 1000 / repeat:.1f}'
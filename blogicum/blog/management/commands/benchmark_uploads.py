@@ -0,0 +1,159 @@
+import os
+import resource
+import struct
+import tempfile
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django import forms
+from django.core.exceptions import ValidationError
+from django.core.handlers.wsgi import WSGIRequest
+from django.core.management.base import BaseCommand
+from PIL import Image
+
+from blog.uploads import ImageUploadHandler
+
+BOUNDARY = 'BenchmarkBoundary'
+
+
+def _png_chunk(kind, data):
+    return (struct.pack('>I', len(data)) + kind + data
+            + struct.pack('>I', zlib.crc32(kind + data)))
+
+
+def write_png_bomb(file, width, height):
+    """Пишет в file одноцветный PNG: мегабайты на диске, гигабайты в памяти.
+
+    Строки сжимаются по одной, поэтому сама картинка в памяти
+    не создаётся.
+    """
+    file.write(b'\x89PNG\r\n\x1a\n')
+    file.write(_png_chunk(
+        b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 0, 0, 0, 0)
+    ))
+    compressor = zlib.compressobj(9)
+    row = bytes(width + 1)
+    for _ in range(height):
+        data = compressor.compress(row)
+        if data:
+            file.write(_png_chunk(b'IDAT', data))
+    file.write(_png_chunk(b'IDAT', compressor.flush()))
+    file.write(_png_chunk(b'IEND', b''))
+
+
+def write_photo(file, width, height):
+    """Пишет в file JPEG с шумом, который сжимается как фотография."""
+    Image.effect_noise((width, height), 64).convert('RGB').save(
+        file, format='JPEG', quality=90
+    )
+
+
+def write_request_body(path, filename, write_image, width, height):
+    """Сохраняет тело multipart-запроса с изображением в поле image."""
+    with open(path, 'wb') as body:
+        body.write(
+            f'--{BOUNDARY}\r\n'
+            'Content-Disposition: form-data; name="image";'
+            f' filename="{filename}"\r\n'
+            'Content-Type: application/octet-stream\r\n\r\n'.encode()
+        )
+        write_image(body, width, height)
+        body.write(f'\r\n--{BOUNDARY}--\r\n'.encode())
+
+
+def run_in_new_process(func, *args):
+    """Выполняет func в отдельном процессе и возвращает результат.
+
+    ru_maxrss хранит пик за всё время жизни процесса и наследуется
+    порождённым процессом, поэтому и тяжёлая подготовка данных,
+    и каждый замер выполняются в своём процессе.
+    """
+    with ProcessPoolExecutor(
+        max_workers=1, max_tasks_per_child=1, initializer=django.setup
+    ) as pool:
+        return pool.submit(func, *args).result()
+
+
+def measure_upload(path, bounded, decode):
+    """Разбирает запрос из файла в отдельном процессе.
+
+    Возвращает (принят ли файл, время в секундах, прирост пиковой
+    RSS процесса в КиБ).
+    """
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    with open(path, 'rb') as body:
+        request = WSGIRequest({
+            'REQUEST_METHOD': 'POST',
+            'PATH_INFO': '/posts/create/',
+            'CONTENT_TYPE': f'multipart/form-data; boundary={BOUNDARY}',
+            'CONTENT_LENGTH': str(os.path.getsize(path)),
+            'wsgi.input': body,
+        })
+        if bounded:
+            request.upload_errors = {}
+            request.upload_handlers = [ImageUploadHandler(request)]
+        uploaded = request.FILES.get('image')
+    try:
+        # Та же проверка, что у поля image формы поста.
+        uploaded = forms.ImageField().clean(uploaded)
+    except ValidationError:
+        uploaded = None
+    if uploaded and decode:
+        # Так изображение открывает задача построения копий.
+        uploaded.seek(0)
+        with Image.open(uploaded) as image:
+            image.load()
+    elapsed = time.perf_counter() - started
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return uploaded is not None, elapsed, peak - baseline
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет время и пиковую память процесса при загрузке изображения'
+        ' поста стандартными обработчиками Django и ImageUploadHandler.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--photo', type=int, nargs=2, action='append',
+            metavar=('WIDTH', 'HEIGHT'),
+            help='Размеры JPEG-фотографии; можно указать несколько раз.'
+        )
+        parser.add_argument(
+            '--bomb', type=int, nargs=2, default=(12_000, 12_000),
+            metavar=('WIDTH', 'HEIGHT'),
+            help='Размеры одноцветного PNG, «бомбы декомпрессии».'
+        )
+        parser.add_argument(
+            '--no-decode', action='store_false', dest='decode',
+            help='Не декодировать принятые изображения.'
+        )
+
+    def handle(self, *args, photo, bomb, decode, **options):
+        cases = [
+            (f'JPEG {width}x{height}', 'photo.jpg', write_photo,
+             width, height)
+            for width, height in photo or [(4000, 3000), (8000, 6000)]
+        ]
+        cases.append((f'PNG-бомба {bomb[0]}x{bomb[1]}', 'bomb.png',
+                      write_png_bomb, *bomb))
+        with tempfile.TemporaryDirectory() as directory:
+            for number, (name, *image) in enumerate(cases):
+                path = os.path.join(directory, f'{number}.body')
+                run_in_new_process(write_request_body, path, *image)
+                size = os.path.getsize(path) / 2**20
+                self.stdout.write(f'{name}, {size:.1f} МиБ:')
+                for label, bounded in (('стандартные', False),
+                                       ('ImageUploadHandler', True)):
+                    accepted, elapsed, peak = run_in_new_process(
+                        measure_upload, path, bounded, decode
+                    )
+                    self.stdout.write(
+                        f'  {label}: {"принят" if accepted else "отклонён"},'
+                        f' {elapsed * 1000:.0f} мс,'
+                        f' пик RSS +{peak / 1024:.1f} МиБ'
+                    )
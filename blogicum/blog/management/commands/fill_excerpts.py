@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+
+from blog.constants import COUNT_CHUNK_SIZE
+from blog.feed import iter_chunks
+from blog.models import FeedEntry, Post
+
+
+class Command(BaseCommand):
+    help = 'Заполняет сохранённое начало текста (excerpt) у постов и ленты.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=COUNT_CHUNK_SIZE,
+            help='Сколько постов обрабатывать за один запрос.'
+        )
+
+    def handle(self, *args, chunk_size, **options):
+        checked = updated = 0
+        for posts in iter_chunks(
+            Post.objects.only('pk', 'text', 'excerpt'), chunk_size
+        ):
+            checked += len(posts)
+            stale = []
+            for post in posts:
+                excerpt = post.get_excerpt()
+                if post.excerpt != excerpt:
+                    post.excerpt = excerpt
+                    stale.append(post)
+            Post.objects.bulk_update(stale, ['excerpt'])
+            FeedEntry.objects.bulk_update(
+                [
+                    FeedEntry(post_id=post.pk, excerpt=post.excerpt)
+                    for post in stale
+                ],
+                ['excerpt'],
+            )
+            updated += len(stale)
+        self.stdout.write(self.style.SUCCESS(
+            f'Проверено постов: {checked}, обновлено: {updated}.'
+        ))
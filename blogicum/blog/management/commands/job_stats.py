@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from blog.constants import JOB_METRICS_WINDOW
+from blog.jobs import get_job_metrics
+
+
+def format_duration(value):
+    return '—' if value is None else f'{value.total_seconds():.2f} с'
+
+
+class Command(BaseCommand):
+    help = (
+        'Показывает очередь фоновых задач, их пропускную способность'
+        ' и задержки.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--window', type=int, default=JOB_METRICS_WINDOW,
+            help='За сколько последних секунд считать выполненные задачи.'
+        )
+
+    def handle(self, *args, window, **options):
+        metrics = get_job_metrics(window)
+        self.stdout.write(
+            f'В очереди: {metrics["queued"]},'
+            f' выполняется: {metrics["running"]},'
+            f' не выполнено: {metrics["failed"]}.\n'
+            f'Выполнено за {window} с: {metrics["done"]}'
+            f' ({metrics["per_minute"]:.1f} в минуту).\n'
+            f'Ожидание в очереди: {format_duration(metrics["wait"])},'
+            f' время до готовности: {format_duration(metrics["latency"])}'
+            f' (максимум {format_duration(metrics["max_latency"])}).'
+        )
@@ -0,0 +1,47 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
+
+from blog.constants import LOAD_BATCH_SIZE
+from blog.dumps import DumpLoader
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает дамп в формате фикстур Django (JSON или JSON Lines,'
+        ' можно .gz) пакетными вставками без сигналов. Загружаются'
+        ' пользователи, категории, местоположения, посты и комментарии;'
+        ' остальные модели пропускаются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+', help='Файлы дампа.')
+        parser.add_argument(
+            '--batch-size', type=int, default=LOAD_BATCH_SIZE,
+            help='Сколько объектов модели вставлять за один запрос.'
+        )
+
+    def handle(self, *args, paths, batch_size, **options):
+        loader = DumpLoader(batch_size)
+        started = time.monotonic()
+        try:
+            loader.load_files(paths)
+        except (OSError, ValueError) as error:
+            raise CommandError(error)
+        except IntegrityError as error:
+            raise CommandError(
+                'Объекты дампа конфликтуют с данными в базе (дамп уже'
+                ' загружен?): загрузчик только добавляет объекты и'
+                ' рассчитан на пустую базу. Пачки до ошибки сохранены.'
+                f' Ошибка базы: {error}'
+            )
+        elapsed = time.monotonic() - started
+        total = sum(loader.counts.values())
+        for model, count in loader.counts.items():
+            self.stdout.write(f'{model._meta.label}: {count}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено объектов: {total}, пропущено: {loader.skipped},'
+            f' за {elapsed:.1f} с'
+            f' ({total / max(elapsed, 1e-6):.0f} в секунду).'
+        ))
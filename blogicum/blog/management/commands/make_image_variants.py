@@ -0,0 +1,82 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from blog.dumps import get_pk_ranges
+from blog.jobs import save_post_image_variants
+from blog.models import Post
+
+
+def get_posts_with_images(regenerate=False):
+    queryset = Post.objects.exclude(image='').order_by('pk')
+    if not regenerate:
+        queryset = queryset.filter(image_variants={})
+    return queryset
+
+
+def fill_range(first, last, regenerate=False):
+    """Строит копии изображений постов с pk из [first, last].
+
+    Запускается и в отдельных процессах. Возвращает число обработанных
+    постов и список pk, изображения которых прочитать не удалось.
+    """
+    posts = get_posts_with_images(regenerate).filter(
+        pk__gte=first, pk__lte=last
+    ).values_list('pk', flat=True)
+    done, failed = 0, []
+    for pk in posts.iterator():
+        try:
+            save_post_image_variants(pk)
+        except (OSError, ValueError):
+            failed.append(pk)
+            continue
+        done += 1
+    return done, failed
+
+
+class Command(BaseCommand):
+    help = (
+        'Строит уменьшенные копии изображений постов, загруженных'
+        ' до появления копий.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=1,
+            help='Сколько процессов обрабатывают диапазоны pk параллельно.'
+        )
+        parser.add_argument(
+            '--all', action='store_true', dest='regenerate',
+            help='Построить копии заново для всех постов с изображением.'
+        )
+
+    def handle(self, *args, workers, regenerate, **options):
+        if workers < 1:
+            raise CommandError('--workers должен быть не меньше 1.')
+        ranges = get_pk_ranges(get_posts_with_images(regenerate), workers)
+        tasks = [(first, last, regenerate) for first, last in ranges]
+        started = time.monotonic()
+        if workers == 1:
+            results = [fill_range(*task) for task in tasks]
+        else:
+            # Дочерним процессам нельзя наследовать открытые соединения.
+            connections.close_all()
+            with ProcessPoolExecutor(
+                max_workers=workers, initializer=django.setup
+            ) as pool:
+                futures = [pool.submit(fill_range, *task) for task in tasks]
+                results = [future.result() for future in futures]
+        done = sum(count for count, _failed in results)
+        failed = [pk for _count, pks in results for pk in pks]
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано постов: {done} за'
+            f' {time.monotonic() - started:.1f} с.'
+        ))
+        if failed:
+            self.stderr.write(
+                'Не удалось прочитать изображения постов: '
+                + ', '.join(map(str, failed))
+            )
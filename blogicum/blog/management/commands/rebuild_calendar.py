@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from blog.archive import CALENDAR_SOURCES, rebuild_calendar
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает по дням число постов и комментариев, по которому'
+        ' строится навигация по датам в админке.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--kind', action='append', dest='kinds',
+            choices=list(CALENDAR_SOURCES),
+            help='Какой счётчик пересчитать; по умолчанию все.'
+        )
+
+    def handle(self, *args, kinds, **options):
+        totals = rebuild_calendar(kinds or tuple(CALENDAR_SOURCES))
+        for kind, days in totals.items():
+            self.stdout.write(self.style.SUCCESS(
+                f'{kind}: дней с записями — {days}.'
+            ))
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.constants import FEED_CHUNK_SIZE
+from blog.feed import check_feed, rebuild_feed
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересобирает материализованную ленту постов. '
+        'С --check только сверяет её с постами.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check', action='store_true',
+            help='Проверить согласованность ленты, ничего не меняя.'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=FEED_CHUNK_SIZE,
+            help='Сколько постов обрабатывать за один запрос.'
+        )
+
+    def handle(self, *args, check, chunk_size, **options):
+        if not check:
+            total = rebuild_feed(chunk_size)
+            self.stdout.write(self.style.SUCCESS(
+                f'Лента пересобрана, записей: {total}.'
+            ))
+            return
+        report = check_feed(chunk_size)
+        problems = {key: ids for key, ids in report.items() if ids}
+        if not problems:
+            self.stdout.write(self.style.SUCCESS('Лента согласована.'))
+            return
+        for key, ids in problems.items():
+            shown = ', '.join(map(str, ids[:20]))
+            self.stdout.write(f'{key}: {len(ids)} ({shown})')
+        raise CommandError('Лента не согласована, выполните rebuild_feed.')
@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand
+from django.db.models import F
+
+from blog.constants import COUNT_CHUNK_SIZE
+from blog.feed import iter_chunks
+from blog.models import FeedEntry, Post
+from blog.pagecache import page_tag, purge_page_tags
+from blog.utils import get_comment_count_subquery
+
+
+def _repair_counts(queryset):
+    """Исправляет счётчики записей queryset; возвращает их pk.
+
+    У записи ленты pk совпадает с pk поста, поэтому подзапрос
+    с числом комментариев подходит и ей.
+    """
+    stale = list(
+        queryset.annotate(actual=get_comment_count_subquery())
+        .exclude(comment_count=F('actual'))
+        .values_list('pk', flat=True)
+    )
+    queryset.model.objects.filter(pk__in=stale).update(
+        comment_count=get_comment_count_subquery()
+    )
+    return stale
+
+
+class Command(BaseCommand):
+    help = (
+        'Сверяет и исправляет сохранённые счётчики комментариев постов'
+        ' и ленты.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=COUNT_CHUNK_SIZE,
+            help='Сколько постов проверять за один запрос.'
+        )
+
+    def handle(self, *args, chunk_size, **options):
+        checked = fixed = 0
+        for posts in iter_chunks(Post.objects.only('pk'), chunk_size):
+            pks = [post.pk for post in posts]
+            checked += len(pks)
+            stale = set(_repair_counts(Post.objects.filter(pk__in=pks)))
+            fixed += len(stale)
+            stale.update(_repair_counts(FeedEntry.objects.filter(pk__in=pks)))
+            purge_page_tags(*(page_tag('post', pk) for pk in stale))
+        self.stdout.write(self.style.SUCCESS(
+            f'Проверено постов: {checked}, исправлено счётчиков: {fixed}.'
+        ))
@@ -0,0 +1,57 @@
+import os
+import sqlite3
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+
+class Command(BaseCommand):
+    help = (
+        'Обновляет снимки SQLite, которые служат репликами для чтения. '
+        'С --interval работает в цикле.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help='Период обновления в секундах; 0 — обновить один раз.'
+        )
+
+    def handle(self, *args, interval, **options):
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError(
+                'Реплики не настроены: задайте переменную BLOGICUM_REPLICAS.'
+            )
+        primary = settings.DATABASES[DEFAULT_DB_ALIAS]
+        if not primary['ENGINE'].endswith('sqlite3'):
+            raise CommandError('Снимки поддерживаются только для SQLite.')
+        while True:
+            for alias in settings.DATABASE_REPLICAS:
+                started = time.monotonic()
+                self.make_snapshot(
+                    primary['NAME'], settings.DATABASES[alias]['NAME']
+                )
+                self.stdout.write(
+                    f'{alias}: снимок обновлён за '
+                    f'{time.monotonic() - started:.2f} с.'
+                )
+            if not interval:
+                break
+            time.sleep(interval)
+
+    def make_snapshot(self, source, target):
+        """Копирует базу онлайн-бэкапом и атомарно подменяет файл реплики."""
+        target = Path(target)
+        temporary = target.with_name(f'{target.name}.tmp')
+        source_connection = sqlite3.connect(source)
+        target_connection = sqlite3.connect(temporary)
+        try:
+            source_connection.backup(target_connection)
+        finally:
+            target_connection.close()
+            source_connection.close()
+        # Открытые соединения дочитывают старый файл, новые видят снимок.
+        os.replace(temporary, target)
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand
+
+from blog.constants import COUNT_CHUNK_SIZE
+from blog.feed import iter_chunks
+from blog.models import Comment, Post
+from blog.rendering import RENDERER_VERSION
+
+
+class Command(BaseCommand):
+    help = (
+        'Заново отрисовывает сохранённый HTML текстов постов и комментариев,'
+        ' если он получен прежней версией правил отрисовки.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=COUNT_CHUNK_SIZE,
+            help='Сколько записей обрабатывать за один запрос.'
+        )
+        parser.add_argument(
+            '--all', action='store_true', dest='rerender_all',
+            help='Отрисовать все записи, а не только устаревшие.'
+        )
+
+    def handle(self, *args, chunk_size, rerender_all, **options):
+        for model in (Post, Comment):
+            queryset = model.objects.all()
+            if not rerender_all:
+                queryset = queryset.exclude(
+                    text_html_version=RENDERER_VERSION
+                )
+            updated = self.rerender(queryset, chunk_size)
+            self.stdout.write(self.style.SUCCESS(
+                f'{model._meta.verbose_name_plural}: обновлено {updated}.'
+            ))
+
+    @staticmethod
+    def rerender(queryset, chunk_size):
+        updated = 0
+        for objects in iter_chunks(queryset.only('pk', 'text'), chunk_size):
+            for obj in objects:
+                obj.render_text_html()
+            queryset.model.objects.bulk_update(
+                objects, ['text_html', 'text_html_version']
+            )
+            updated += len(objects)
+        return updated
@@ -0,0 +1,70 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from blog.constants import JOB_POLL_INTERVAL
+from blog.jobs import claim_jobs, requeue_stale_jobs, run_job
+from blog.models import Job
+
+
+class Command(BaseCommand):
+    help = (
+        'Выполняет фоновые задачи из очереди в базе данных,'
+        ' например построение копий изображений постов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=1,
+            help='Сколько процессов выполняют задачи параллельно.'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить задачи, которые уже в очереди, и завершиться.'
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=JOB_POLL_INTERVAL,
+            help='Сколько секунд ждать новых задач при пустой очереди.'
+        )
+
+    def handle(self, *args, workers, once, poll_interval, **options):
+        if workers < 1:
+            raise CommandError('--workers должен быть не меньше 1.')
+        pool = None
+        if workers > 1:
+            # Дочерним процессам нельзя наследовать открытые соединения.
+            connections.close_all()
+            pool = ProcessPoolExecutor(
+                max_workers=workers, initializer=django.setup
+            )
+        started = time.monotonic()
+        statuses = []
+        try:
+            while True:
+                requeue_stale_jobs()
+                # Пачка по два задания на процесс, чтобы он не простаивал.
+                claimed = claim_jobs(workers * 2)
+                if not claimed:
+                    if once:
+                        break
+                    time.sleep(poll_interval)
+                    continue
+                if pool is None:
+                    statuses += [run_job(pk) for pk in claimed]
+                else:
+                    statuses += pool.map(run_job, claimed)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Выполнено задач: {len(statuses)} за {elapsed:.1f} с'
+            f' ({len(statuses) / max(elapsed, 1e-6):.1f} в секунду),'
+            f' вернулись в очередь или не выполнены:'
+            f' {sum(status != Job.DONE for status in statuses)}.'
+        ))
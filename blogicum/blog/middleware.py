@@ -0,0 +1,27 @@
+from django.conf import settings
+
+from .routers import PRIMARY_PIN_COOKIE
+
+
+class PrimaryPinMiddleware:
+    """Закрепляет за основной базой пользователя, который только что писал.
+
+    Успешный POST ставит короткоживущую cookie, которую учитывает
+    read_from_replica: пока реплика не догнала основную базу,
+    пользователь читает свои изменения из неё.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if request.method == 'POST' and response.status_code < 400:
+            response.set_cookie(
+                PRIMARY_PIN_COOKIE,
+                '1',
+                max_age=settings.REPLICA_LAG_SECONDS,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
@@ -0,0 +1,79 @@
+# Generated by Django 5.1.1 on 2026-10-18 18:12
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.utils.text import Truncator
+
+POPULATE_CHUNK_SIZE = 500
+
+
+def populate_feed(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    FeedEntry = apps.get_model('blog', 'FeedEntry')
+    posts = Post.objects.select_related(
+        'author', 'category', 'location'
+    ).filter(is_published=True, category__is_published=True).order_by('pk')
+    last_pk = 0
+    while True:
+        chunk = list(posts.filter(pk__gt=last_pk)[:POPULATE_CHUNK_SIZE])
+        if not chunk:
+            break
+        last_pk = chunk[-1].pk
+        FeedEntry.objects.bulk_create(
+            FeedEntry(
+                post_id=post.pk,
+                title=post.title,
+                text=Truncator(post.text).words(10, truncate=' …'),
+                pub_date=post.pub_date,
+                image=post.image.name or '',
+                comment_count=post.comment_count,
+                author_id=post.author_id,
+                author_username=post.author.username,
+                category_id=post.category_id,
+                category_title=post.category.title,
+                category_slug=post.category.slug,
+                location_id=post.location_id,
+                location_name=post.location.name if post.location else '',
+                location_is_published=bool(
+                    post.location and post.location.is_published
+                ),
+            )
+            for post in chunk
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0007_feed_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedEntry',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='feed_entry', serialize=False, to='blog.post', verbose_name='Публикация')),
+                ('title', models.CharField(max_length=256)),
+                ('text', models.TextField()),
+                ('pub_date', models.DateTimeField()),
+                ('image', models.CharField(blank=True, max_length=100)),
+                ('comment_count', models.PositiveIntegerField(default=0)),
+                ('author_username', models.CharField(max_length=150)),
+                ('category_title', models.CharField(max_length=256)),
+                ('category_slug', models.SlugField()),
+                ('location_name', models.CharField(blank=True, max_length=256)),
+                ('location_is_published', models.BooleanField(default=False)),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('category', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='blog.category')),
+                ('location', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='blog.location')),
+            ],
+            options={
+                'verbose_name': 'запись ленты',
+                'verbose_name_plural': 'Лента',
+                'indexes': [models.Index(fields=['pub_date'], name='feed_entry_pub_date_idx'), models.Index(fields=['category', 'pub_date'], name='feed_entry_category_idx')],
+            },
+        ),
+        migrations.RunPython(populate_feed, migrations.RunPython.noop),
+    ]
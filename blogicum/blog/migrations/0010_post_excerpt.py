@@ -0,0 +1,54 @@
+# Generated by Django 5.1.1 on 2026-10-18 18:19
+
+from django.db import migrations, models
+from django.utils.text import Truncator
+
+BACKFILL_CHUNK_SIZE = 1000
+EXCERPT_WORDS = 10
+
+
+def fill_excerpts(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    FeedEntry = apps.get_model('blog', 'FeedEntry')
+    last_pk = 0
+    while True:
+        posts = list(
+            Post.objects.filter(pk__gt=last_pk)
+            .only('pk', 'text')
+            .order_by('pk')[:BACKFILL_CHUNK_SIZE]
+        )
+        if not posts:
+            break
+        last_pk = posts[-1].pk
+        for post in posts:
+            post.excerpt = Truncator(post.text).words(
+                EXCERPT_WORDS, truncate=' …'
+            )
+        Post.objects.bulk_update(posts, ['excerpt'])
+        # В ленте раньше хранился полный текст: заменяем его на начало.
+        FeedEntry.objects.bulk_update(
+            [FeedEntry(post_id=post.pk, excerpt=post.excerpt)
+             for post in posts],
+            ['excerpt'],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0009_post_is_visible'),
+    ]
+
+    operations = [
+        migrations.RenameField(
+            model_name='feedentry',
+            old_name='text',
+            new_name='excerpt',
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='excerpt',
+            field=models.TextField(blank=True, default='', editable=False, help_text='Первые слова текста для карточки в ленте.', verbose_name='Начало текста'),
+        ),
+        migrations.RunPython(fill_excerpts, migrations.RunPython.noop),
+    ]
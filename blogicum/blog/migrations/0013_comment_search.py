@@ -0,0 +1,40 @@
+# Generated by Django 5.1.1 on 2026-10-18 18:32
+
+import blog.search
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def create_search_index(apps, schema_editor):
+    blog.search.install_search_index(
+        schema_editor.connection, [blog.search.COMMENT_SEARCH_INDEX]
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    blog.search.drop_search_index(
+        schema_editor.connection, [blog.search.COMMENT_SEARCH_INDEX]
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0012_post_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CommentSearch',
+            fields=[
+                ('comment', models.OneToOneField(db_column='rowid', db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_entry', serialize=False, to='blog.comment')),
+                ('document', blog.search.SearchDocumentField(db_column='blog_comment_search')),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'blog_comment_search',
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
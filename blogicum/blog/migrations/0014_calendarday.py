@@ -0,0 +1,52 @@
+# Generated by Django 5.1.1 on 2026-10-18 18:36
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+
+def fill_calendar(apps, schema_editor):
+    CalendarDay = apps.get_model('blog', 'CalendarDay')
+    sources = (
+        ('post', apps.get_model('blog', 'Post'), 'pub_date'),
+        ('comment', apps.get_model('blog', 'Comment'), 'created_at'),
+    )
+    for kind, model, field in sources:
+        rows = (
+            model.objects.annotate(
+                day=TruncDate(field, tzinfo=timezone.get_current_timezone())
+            )
+            .values('day')
+            .annotate(total=Count('pk'))
+            .order_by()
+        )
+        CalendarDay.objects.bulk_create(
+            CalendarDay(kind=kind, day=row['day'], count=row['total'])
+            for row in rows.iterator()
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0013_comment_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CalendarDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('post', 'Посты по дате публикации'), ('comment', 'Комментарии по дате добавления')], max_length=16, verbose_name='Что считается')),
+                ('day', models.DateField(verbose_name='День')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='Количество')),
+            ],
+            options={
+                'verbose_name': 'день календаря',
+                'verbose_name_plural': 'Календарь',
+                'constraints': [models.UniqueConstraint(fields=('kind', 'day'), name='calendar_day_kind_day_unique')],
+            },
+        ),
+        migrations.RunPython(fill_calendar, migrations.RunPython.noop),
+    ]
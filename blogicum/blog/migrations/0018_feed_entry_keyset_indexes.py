@@ -0,0 +1,31 @@
+# Generated by Django 5.1.1 on 2026-10-18 19:01
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0017_job'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='feedentry',
+            name='feed_entry_pub_date_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='feedentry',
+            name='feed_entry_category_idx',
+        ),
+        migrations.AddIndex(
+            model_name='feedentry',
+            index=models.Index(fields=['pub_date', 'post'], name='feed_entry_pub_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feedentry',
+            index=models.Index(fields=['category', 'pub_date', 'post'], name='feed_entry_category_idx'),
+        ),
+    ]
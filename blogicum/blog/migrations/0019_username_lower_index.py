@@ -0,0 +1,28 @@
+# Generated by Django 5.1.1 on 2026-10-18 19:20
+
+from django.conf import settings
+from django.db import migrations
+
+import blog.search
+
+
+def create_username_index(apps, schema_editor):
+    user_model = apps.get_model(settings.AUTH_USER_MODEL)
+    schema_editor.add_index(user_model, blog.search.USERNAME_LOWER_INDEX)
+
+
+def drop_username_index(apps, schema_editor):
+    user_model = apps.get_model(settings.AUTH_USER_MODEL)
+    schema_editor.remove_index(user_model, blog.search.USERNAME_LOWER_INDEX)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0018_feed_entry_keyset_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(create_username_index, drop_username_index),
+    ]
@@ -0,0 +1,41 @@
+from django.db import migrations
+
+# Вид задачи из blog.jobs; модуль задач в миграции не импортируется
+IMAGE_VARIANTS_JOB = 'image_variants'
+
+
+def queue_missing_image_variants(apps, schema_editor):
+    """Ставит в очередь копии для постов, загруженных до очереди задач.
+
+    Без задачи такие посты показывали бы заглушку бессрочно.
+    """
+    Post = apps.get_model('blog', 'Post')
+    Job = apps.get_model('blog', 'Job')
+    queued = {
+        payload.get('post_id') for payload in Job.objects.filter(
+            kind=IMAGE_VARIANTS_JOB, status__in=('queued', 'running'),
+        ).values_list('payload', flat=True)
+    }
+    post_ids = Post.objects.exclude(image='').filter(
+        image_variants={}
+    ).values_list('pk', flat=True).iterator()
+    Job.objects.bulk_create(
+        (
+            Job(kind=IMAGE_VARIANTS_JOB, payload={'post_id': pk})
+            for pk in post_ids if pk not in queued
+        ),
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0019_username_lower_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            queue_missing_image_variants, migrations.RunPython.noop
+        ),
+    ]
@@ -1,11 +1,29 @@
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.utils import timezone
+from django.utils.safestring import mark_safe
+from django.utils.text import Truncator
 
-from .constants import MAX_LENGTH, MAX_LENGTH_TITLE, MAX_LENGTH_NAME
+from .constants import (CARD_TEXT_WORDS, MAX_LENGTH, MAX_LENGTH_TITLE,
+                        MAX_LENGTH_NAME)
+from .images import (CARD_VARIANTS, DETAIL_VARIANTS, get_srcset,
+                     get_variant_url)
+from .rendering import RENDERER_VERSION, render_text
+from .search import (COMMENT_SEARCH_INDEX, POST_SEARCH_INDEX,
+                     SearchDocumentField)
 
 User = get_user_model()
 
 
+class UpdatedAtField(models.DateTimeField):
+    """Момент последнего изменения записи, обновляется при save()."""
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('auto_now', True)
+        kwargs.setdefault('verbose_name', 'Изменено')
+        super().__init__(*args, **kwargs)
+
+
 class TimeStampedModel(models.Model):
     is_published = models.BooleanField(
         default=True,
@@ -20,11 +38,51 @@ class TimeStampedModel(models.Model):
         blank=False,
         verbose_name='Добавлено',
     )
+    updated_at = UpdatedAtField()
 
     class Meta:
         abstract = True
 
 
+class RenderedHTMLField(models.TextField):
+    """Готовый HTML, полученный из другого поля; в формах не редактируется."""
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('blank', True)
+        kwargs.setdefault('default', '')
+        kwargs.setdefault('editable', False)
+        super().__init__(*args, **kwargs)
+
+
+class RenderedTextModel(models.Model):
+    """Хранит готовый HTML поля text, чтобы не отрисовывать его на лету."""
+
+    text_html = RenderedHTMLField(verbose_name='HTML текста')
+    text_html_version = models.PositiveSmallIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Версия отрисовки текста',
+    )
+
+    class Meta:
+        abstract = True
+
+    def render_text_html(self):
+        self.text_html = render_text(self.text)
+        self.text_html_version = RENDERER_VERSION
+
+    @property
+    def body_html(self):
+        """Сохранённый HTML; устаревший отрисовывается заново."""
+        if self.text_html_version != RENDERER_VERSION:
+            return render_text(self.text)
+        return mark_safe(self.text_html)
+
+    def save(self, *args, **kwargs):
+        self.render_text_html()
+        super().save(*args, **kwargs)
+
+
 class Category(TimeStampedModel):
     title = models.CharField(
         max_length=MAX_LENGTH,
@@ -72,7 +130,7 @@ class Location(TimeStampedModel):
         return self.name[:MAX_LENGTH_NAME]
 
 
-class Post(TimeStampedModel):
+class Post(RenderedTextModel, TimeStampedModel):
     title = models.CharField(
         max_length=MAX_LENGTH,
         null=False,
@@ -96,6 +154,7 @@ class Post(TimeStampedModel):
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
+        db_index=False,
         verbose_name='Автор публикации',
     )
     location = models.ForeignKey(
@@ -118,19 +177,131 @@ class Post(TimeStampedModel):
         help_text="Загрузите изображение для публикации",
         blank=True
     )
+    excerpt = models.TextField(
+        blank=True,
+        default='',
+        editable=False,
+        verbose_name='Начало текста',
+        help_text='Первые слова текста для карточки в ленте.'
+    )
+    image_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name='Уменьшенные копии изображения',
+    )
+    comment_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество комментариев',
+    )
+    is_visible = models.BooleanField(
+        default=False,
+        editable=False,
+        verbose_name='Виден в лентах',
+        help_text=(
+            'Пост опубликован, его категория опубликована и дата '
+            'публикации наступила. Отложенные посты включает команда '
+            'activate_scheduled_posts.'
+        )
+    )
 
     class Meta:
         verbose_name = 'публикация'
         verbose_name_plural = 'Публикации'
+        # Индексы под ленты: фильтр по видимости и сортировка по дате.
+        # Частичные индексы хранят только видимые (или ожидающие
+        # публикации) посты; составные индексы по author и post заменяют
+        # одиночные индексы FK.
+        indexes = (
+            models.Index(
+                fields=('pub_date',),
+                name='post_visible_pub_date_idx',
+                condition=models.Q(is_visible=True),
+            ),
+            models.Index(
+                fields=('category', 'pub_date'),
+                name='post_category_pub_date_idx',
+                condition=models.Q(is_visible=True),
+            ),
+            models.Index(
+                fields=('pub_date',),
+                name='post_scheduled_pub_date_idx',
+                condition=models.Q(is_visible=False, is_published=True),
+            ),
+            models.Index(
+                fields=('author', 'pub_date'),
+                name='post_author_pub_date_idx',
+            ),
+        )
 
     def __str__(self):
         return self.title[:MAX_LENGTH_TITLE]
 
+    def get_is_visible(self):
+        """Вычисляет, должен ли пост сейчас показываться в лентах."""
+        return bool(
+            self.is_published
+            and self.pub_date <= timezone.now()
+            and self.category_id is not None
+            and self.category.is_published
+        )
+
+    def get_excerpt(self):
+        """Начало текста в том виде, в каком его показывает карточка."""
+        return Truncator(self.text).words(CARD_TEXT_WORDS, truncate=' …')
+
+    def reset_image_variants(self):
+        """Сбрасывает копии изображения, если оно новое или удалено.
+
+        Копии нового изображения строит фоновая задача (см. сигнал
+        queue_image_variants), до тех пор вместо картинки выводится
+        заглушка. Если задача упала окончательно, копии заменяет запись
+        об оригинале (см. get_original_variants).
+        """
+        self._image_uploaded = bool(self.image) and not self.image._committed
+        if not self.image or self._image_uploaded:
+            self.image_variants = {}
 
-class Comment(models.Model):
+    @property
+    def card_image_url(self):
+        return get_variant_url(self.image, self.image_variants, 'card')
+
+    @property
+    def card_srcset(self):
+        return get_srcset(self.image, self.image_variants, CARD_VARIANTS)
+
+    @property
+    def detail_image_url(self):
+        return get_variant_url(self.image, self.image_variants, 'detail')
+
+    @property
+    def detail_srcset(self):
+        return get_srcset(self.image, self.image_variants, DETAIL_VARIANTS)
+
+    def save(self, *args, **kwargs):
+        self.is_visible = self.get_is_visible()
+        self.excerpt = self.get_excerpt()
+        self.reset_image_variants()
+        # Счётчик комментариев меняется только атомарно через F(),
+        # поэтому при обновлении поста его значение не перезаписываем.
+        if (
+            self.pk is not None
+            and not self._state.adding
+            and kwargs.get('update_fields') is None
+        ):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'comment_count'
+            ]
+        super().save(*args, **kwargs)
+
+
+class Comment(RenderedTextModel):
     post = models.ForeignKey(
         Post,
         on_delete=models.CASCADE,
+        db_index=False,
         verbose_name='Публикация',
         related_name='comments'
     )
@@ -150,10 +321,250 @@ class Comment(models.Model):
         blank=False,
         verbose_name='Добавлено',
     )
+    updated_at = UpdatedAtField()
 
     class Meta:
         verbose_name = 'Коментарий'
         verbose_name_plural = 'коментарий'
+        indexes = (
+            models.Index(
+                fields=('post', 'created_at'),
+                name='comment_post_created_at_idx',
+            ),
+        )
 
     def __str__(self):
         return self.text[:MAX_LENGTH_TITLE]
+
+
+class FeedEntry(models.Model):
+    """Запись материализованной ленты с готовыми данными карточки поста.
+
+    Таблица содержит только опубликованные посты опубликованных категорий
+    и обновляется сигналами, поэтому главная лента и лента категории
+    читаются без JOIN и пересчёта видимости.
+    """
+
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='feed_entry',
+        verbose_name='Публикация',
+    )
+    title = models.CharField(max_length=MAX_LENGTH)
+    excerpt = models.TextField()
+    pub_date = models.DateTimeField()
+    image = models.CharField(max_length=100, blank=True)
+    image_variants = models.JSONField(default=dict, blank=True)
+    comment_count = models.PositiveIntegerField(default=0)
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+    )
+    author_username = models.CharField(max_length=150)
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.CASCADE,
+        db_index=False,
+        related_name='+',
+    )
+    category_title = models.CharField(max_length=MAX_LENGTH)
+    category_slug = models.SlugField()
+    location = models.ForeignKey(
+        Location,
+        null=True,
+        on_delete=models.SET_NULL,
+        related_name='+',
+    )
+    location_name = models.CharField(max_length=MAX_LENGTH, blank=True)
+    location_is_published = models.BooleanField(default=False)
+
+    class Meta:
+        verbose_name = 'запись ленты'
+        verbose_name_plural = 'Лента'
+        indexes = (
+            # post — не rowid SQLite (bigint PRIMARY KEY), поэтому
+            # второй ключ сортировки ленты указывается явно.
+            models.Index(
+                fields=('pub_date', 'post'),
+                name='feed_entry_pub_date_idx',
+            ),
+            models.Index(
+                fields=('category', 'pub_date', 'post'),
+                name='feed_entry_category_idx',
+            ),
+        )
+
+    def __str__(self):
+        return self.title[:MAX_LENGTH_TITLE]
+
+    def as_post(self):
+        """Собирает несохраняемый Post для шаблона карточки."""
+        post = Post(
+            id=self.post_id,
+            title=self.title,
+            excerpt=self.excerpt,
+            pub_date=self.pub_date,
+            image=self.image,
+            image_variants=self.image_variants,
+            comment_count=self.comment_count,
+            is_published=True,
+        )
+        post.author = User(id=self.author_id, username=self.author_username)
+        post.category = Category(
+            id=self.category_id,
+            title=self.category_title,
+            slug=self.category_slug,
+            is_published=True,
+        )
+        if self.location_id is not None:
+            post.location = Location(
+                id=self.location_id,
+                name=self.location_name,
+                is_published=self.location_is_published,
+            )
+        return post
+
+
+class Job(models.Model):
+    """Фоновая задача в очереди в базе данных.
+
+    Задачи выполняет команда run_jobs в пуле процессов, поэтому
+    долгая работа вроде обработки изображений не задерживает ответ.
+    """
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнена'),
+        (FAILED, 'Не выполнена'),
+    )
+
+    kind = models.CharField(max_length=64, verbose_name='Вид задачи')
+    payload = models.JSONField(default=dict, verbose_name='Параметры')
+    status = models.CharField(
+        max_length=16,
+        choices=STATUS_CHOICES,
+        default=QUEUED,
+        verbose_name='Состояние',
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Запусков',
+    )
+    error = models.TextField(blank=True, verbose_name='Ошибка')
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Добавлена',
+    )
+    started_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Запущена',
+    )
+    finished_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Завершена',
+    )
+
+    class Meta:
+        verbose_name = 'фоновая задача'
+        verbose_name_plural = 'Фоновые задачи'
+        indexes = (
+            models.Index(
+                fields=('status', 'created_at'),
+                name='job_status_created_at_idx',
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.kind} #{self.pk}'
+
+
+class CalendarDay(models.Model):
+    """Число постов или комментариев за день.
+
+    Таблица заменяет группировку по датам всей таблицы: её используют
+    навигация по датам в админке и архив. Счётчики обновляются
+    сигналами, пересчитываются командой rebuild_calendar.
+    """
+
+    POSTS = 'post'
+    COMMENTS = 'comment'
+    KIND_CHOICES = (
+        (POSTS, 'Посты по дате публикации'),
+        (COMMENTS, 'Комментарии по дате добавления'),
+    )
+
+    kind = models.CharField(
+        max_length=16,
+        choices=KIND_CHOICES,
+        verbose_name='Что считается',
+    )
+    day = models.DateField(verbose_name='День')
+    count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество',
+    )
+
+    class Meta:
+        verbose_name = 'день календаря'
+        verbose_name_plural = 'Календарь'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('kind', 'day'),
+                name='calendar_day_kind_day_unique',
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.kind} {self.day}: {self.count}'
+
+
+class PostSearch(models.Model):
+    """Полнотекстовый индекс FTS5 постов (только SQLite).
+
+    Таблицу создаёт и поддерживает blog.search.install_search_index,
+    модель нужна, чтобы присоединять индекс к запросам постов.
+    """
+
+    post = models.OneToOneField(
+        Post,
+        primary_key=True,
+        db_column='rowid',
+        db_constraint=False,
+        on_delete=models.DO_NOTHING,
+        related_name='search_entry',
+    )
+    document = SearchDocumentField(db_column=POST_SEARCH_INDEX.table)
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = POST_SEARCH_INDEX.table
+
+
+class CommentSearch(models.Model):
+    """Полнотекстовый индекс FTS5 текстов комментариев (только SQLite)."""
+
+    comment = models.OneToOneField(
+        Comment,
+        primary_key=True,
+        db_column='rowid',
+        db_constraint=False,
+        on_delete=models.DO_NOTHING,
+        related_name='search_entry',
+    )
+    document = SearchDocumentField(db_column=COMMENT_SEARCH_INDEX.table)
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = COMMENT_SEARCH_INDEX.table
@@ -0,0 +1,239 @@
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import (get_conditional_response,
+                                patch_vary_headers)
+from django.utils.http import quote_etag
+
+from .feed import get_feed_cache_timeout
+from .routers import PRIMARY_PIN_COOKIE
+
+# Заголовок ответа с результатом обращения к кешу страниц
+PAGE_CACHE_HEADER = 'X-Page-Cache'
+
+# Ключи счётчиков попаданий и промахов
+PAGE_CACHE_STATS_KEYS = {
+    'hits': 'page_cache:hits',
+    'misses': 'page_cache:misses',
+}
+
+# Момент последнего сброса любой метки — версия всех страниц сайта
+PAGE_VERSION_KEY = 'page_version'
+
+# Метки лент: их состав меняется и при наступлении отложенной публикации
+FEED_TAGS = {'feed', 'category_feed', 'author_feed'}
+
+
+def page_tag(*parts):
+    """Метка страницы, например ('post', 5) или ('category_feed', 2)."""
+    return ':'.join(str(part) for part in parts)
+
+
+def get_post_tags(posts):
+    """Метки данных, которые выводятся в карточках или на странице постов."""
+    tags = set()
+    for post in posts:
+        tags.update((
+            page_tag('post', post.pk),
+            page_tag('category', post.category_id),
+            page_tag('user', post.author_id),
+        ))
+        if post.location_id:
+            tags.add(page_tag('location', post.location_id))
+    return tags
+
+
+def tag_page(request, *tags):
+    """Отмечает, от каких данных зависит кешируемая страница."""
+    page_tags = getattr(request, 'page_tags', None)
+    if page_tags is not None:
+        page_tags.update(tags)
+
+
+def _get_purge_key(tag):
+    return f'page_purge:{tag}'
+
+
+def purge_page_tags(*tags):
+    """Делает устаревшими все страницы с любой из меток.
+
+    Для метки запоминается момент сброса: страницы, отрисованные
+    раньше него, при чтении считаются промахом. Отметка живёт столько
+    же, сколько сами страницы; пропавшая из кеша отметка тоже
+    означает промах (см. _mark_page_tags).
+    """
+    now = time.time()
+    cache.set_many(
+        {_get_purge_key(tag): now for tag in tags if tag},
+        settings.PAGE_CACHE_TIMEOUT,
+    )
+    cache.set(PAGE_VERSION_KEY, now, None)
+
+
+def get_page_version():
+    """Момент последнего сброса страниц; без отметки — текущий."""
+    version = cache.get(PAGE_VERSION_KEY)
+    if version is None:
+        cache.add(PAGE_VERSION_KEY, time.time(), None)
+        version = cache.get(PAGE_VERSION_KEY)
+    return version
+
+
+def get_page_etag(request, *args, **kwargs):
+    """Версия лент и профиля для condition() без запросов к базе.
+
+    Состав карточек страницы без запроса не узнать, поэтому версией
+    служит момент последнего сброса любой метки: любое изменение,
+    которое видно на страницах, сбрасывает их метки. Для вошедшего
+    пользователя ETag зависит и от его сессии: страница у каждого своя.
+    """
+    viewer = ''
+    if request.user.is_authenticated:
+        viewer = f'{request.user.pk}:{request.session.session_key}'
+    return hashlib.md5(
+        f'{get_page_version()}:{viewer}'.encode(), usedforsecurity=False
+    ).hexdigest()
+
+
+def _get_page_key(request):
+    path = hashlib.md5(
+        request.get_full_path().encode(), usedforsecurity=False
+    ).hexdigest()
+    return f'page:{path}'
+
+
+def _count(outcome):
+    key = PAGE_CACHE_STATS_KEYS[outcome]
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+def get_page_cache_stats():
+    stats = cache.get_many(PAGE_CACHE_STATS_KEYS.values())
+    return {
+        outcome: stats.get(key, 0)
+        for outcome, key in PAGE_CACHE_STATS_KEYS.items()
+    }
+
+
+def reset_page_cache_stats():
+    cache.delete_many(PAGE_CACHE_STATS_KEYS.values())
+
+
+def _mark_page_tags(tags):
+    """Заводит отметки сброса для меток сохраняемой страницы.
+
+    Кеш может вытеснить отметку раньше срока, и тогда сброс метки
+    был бы потерян. Поэтому у каждой метки закешированной страницы
+    есть отметка, хотя бы нулевая, а страница без отметки любой своей
+    метки считается устаревшей. add не затирает отметку сброса,
+    сделанного одновременно с отрисовкой.
+    """
+    for tag in tags:
+        cache.add(_get_purge_key(tag), 0, settings.PAGE_CACHE_TIMEOUT)
+
+
+def _get_cached_page(key):
+    entry = cache.get(key)
+    if entry is None:
+        return None
+    purged = cache.get_many(_get_purge_key(tag) for tag in entry['tags'])
+    if len(purged) < len(entry['tags']) or any(
+        moment >= entry['rendered_at'] for moment in purged.values()
+    ):
+        return None
+    return entry
+
+
+def _may_be_stale(request, rendered_at):
+    """Страница прочитана с реплики вскоре после сброса её меток.
+
+    Реплика могла ещё не получить изменения, поэтому такую страницу
+    не кешируем: иначе старая версия жила бы PAGE_CACHE_TIMEOUT.
+    """
+    if not getattr(request, 'replica_reads', False):
+        return False
+    purged = cache.get_many(_get_purge_key(tag) for tag in request.page_tags)
+    return any(
+        moment > rendered_at - settings.REPLICA_LAG_SECONDS
+        for moment in purged.values()
+    )
+
+
+def _build_response(request, entry):
+    """Ответ из кеша или 304, если у клиента та же версия страницы."""
+    response = HttpResponse(
+        entry['content'], content_type=entry['content_type']
+    )
+    response['ETag'] = entry['etag']
+    return get_conditional_response(
+        request, etag=entry['etag'], response=response
+    )
+
+
+def cache_anonymous_page(view_func):
+    """Кеширует страницу для анонимных GET-запросов.
+
+    View отмечает страницу метками через tag_page, а сигналы
+    сбрасывают метки изменённых постов, категорий, мест и авторов.
+    Время жизни страниц лент ограничено ближайшей отложенной
+    публикацией, как у закешированных размеров лент.
+
+    Страница из кеша отдаётся с сохранённым ETag, и на запрос с той же
+    версией отвечает 304 без обращения к базе.
+    """
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        if (
+            request.method not in ('GET', 'HEAD')
+            or request.user.is_authenticated
+            or PRIMARY_PIN_COOKIE in request.COOKIES
+        ):
+            return view_func(request, *args, **kwargs)
+        key = _get_page_key(request)
+        entry = _get_cached_page(key)
+        if entry is not None:
+            _count('hits')
+            response = _build_response(request, entry)
+            response[PAGE_CACHE_HEADER] = 'HIT'
+            patch_vary_headers(response, ('Cookie',))
+            return response
+        _count('misses')
+        rendered_at = time.time()
+        request.page_tags = set()
+        response = view_func(request, *args, **kwargs)
+        timeout = settings.PAGE_CACHE_TIMEOUT
+        if any(tag.split(':')[0] in FEED_TAGS for tag in request.page_tags):
+            timeout = get_feed_cache_timeout(timeout)
+        if (
+            response.status_code == 200 and timeout
+            and not response.cookies
+            # Страница с токеном CSRF своя у каждого посетителя.
+            and not request.META.get('CSRF_COOKIE_NEEDS_UPDATE')
+            and not _may_be_stale(request, rendered_at)
+        ):
+            if not response.has_header('ETag'):
+                response['ETag'] = quote_etag(hashlib.md5(
+                    response.content, usedforsecurity=False
+                ).hexdigest())
+            _mark_page_tags(request.page_tags)
+            cache.set(key, {
+                'content': response.content,
+                'content_type': response['Content-Type'],
+                'etag': response['ETag'],
+                'tags': sorted(request.page_tags),
+                'rendered_at': rendered_at,
+            }, timeout)
+        response[PAGE_CACHE_HEADER] = 'MISS'
+        if response.status_code == 200 and response.has_header('ETag'):
+            response = get_conditional_response(
+                request, etag=response['ETag'], response=response
+            )
+        return response
+    return wrapper
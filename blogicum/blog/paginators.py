@@ -0,0 +1,295 @@
+import base64
+import binascii
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections
+from django.db.models import Q
+from django.http import HttpResponseRedirect
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+
+from .constants import (ADMIN_COUNT_CACHE_TIMEOUT,
+                        ADMIN_COUNT_ESTIMATE_THRESHOLD)
+
+# Направления перехода по курсору
+NEXT = 'n'
+PREVIOUS = 'p'
+
+# Курсор последней страницы
+LAST = 'last'
+
+
+class DeepPageRedirect(Exception):
+    """Номер страницы за MAX_OFFSET_PAGE: её нужно открыть по url."""
+
+    def __init__(self, url):
+        super().__init__(url)
+        self.url = url
+
+
+def redirect_deep_pages(view_func):
+    """Перенаправляет запросы глубоких страниц, см. DeepPageRedirect."""
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        try:
+            return view_func(request, *args, **kwargs)
+        except DeepPageRedirect as deep_page:
+            return HttpResponseRedirect(deep_page.url)
+    return wrapper
+
+
+def get_page_window(number, num_pages, on_each_side, on_ends):
+    """Номера страниц вокруг текущей и у краёв, пропуски — ELLIPSIS.
+
+    В отличие от Paginator.get_elided_page_range число страниц
+    передаётся явно, чтобы не показывать недоступные по OFFSET.
+    """
+    shown = {
+        *range(1, min(on_ends, num_pages) + 1),
+        *range(max(1, number - on_each_side),
+               min(num_pages, number + on_each_side) + 1),
+        *range(max(1, num_pages - on_ends + 1), num_pages + 1),
+    }
+    window = []
+    for page in sorted(shown):
+        if window and page - window[-1] > 1:
+            window.append(
+                window[-1] + 1 if page - window[-1] == 2
+                else Paginator.ELLIPSIS
+            )
+        window.append(page)
+    return window
+
+
+class CachedCountPaginator(Paginator):
+    """Paginator, который берёт общее число записей из кеша.
+
+    Значение сбрасывается сигналами при публикации, снятии с публикации
+    и переносе постов, а timeout (по умолчанию FEED_COUNT_CACHE_TIMEOUT)
+    ограничивает устаревание.
+    """
+
+    def __init__(self, object_list, per_page, cache_key, timeout=None,
+                 **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.cache_key = cache_key
+        self.timeout = (
+            settings.FEED_COUNT_CACHE_TIMEOUT if timeout is None else timeout
+        )
+
+    @cached_property
+    def count(self):
+        count = cache.get(self.cache_key)
+        if count is None:
+            count = Paginator.count.func(self)
+            cache.set(self.cache_key, count, self.timeout)
+        return count
+
+
+def estimate_row_count(model, using):
+    """Число строк таблицы по статистике планировщика или None.
+
+    SQLite берёт его из sqlite_stat1 (заполняется ANALYZE), PostgreSQL —
+    из pg_class.reltuples.
+    """
+    connection = connections[using]
+    table = model._meta.db_table
+    if connection.vendor == 'sqlite':
+        # Первое число в stat — число строк индекса; у частичных
+        # индексов оно меньше, поэтому берётся наибольшее.
+        sql = (
+            'SELECT MAX(CAST(stat AS INTEGER)) FROM sqlite_stat1'
+            ' WHERE tbl = %s'
+        )
+        params = [table]
+    elif connection.vendor == 'postgresql':
+        sql = 'SELECT reltuples::bigint FROM pg_class WHERE relname = %s'
+        params = [table]
+    else:
+        return None
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            row = cursor.fetchone()
+    except DatabaseError:
+        # Статистики ещё нет: ANALYZE ни разу не выполнялся.
+        return None
+    return row[0] if row and row[0] and row[0] > 0 else None
+
+
+class EstimatedCountPaginator(CachedCountPaginator):
+    """Paginator для списков админки без точного COUNT(*) на каждый запрос.
+
+    Для списка без фильтров по большой таблице число строк берётся
+    из статистики базы, в остальных случаях точное значение кешируется
+    на ADMIN_COUNT_CACHE_TIMEOUT секунд по тексту запроса.
+    """
+
+    def __init__(self, object_list, per_page, orphans=0,
+                 allow_empty_first_page=True):
+        try:
+            sql = str(object_list.query)
+        except EmptyResultSet:
+            sql = ''
+        digest = hashlib.md5(sql.encode(), usedforsecurity=False)
+        super().__init__(
+            object_list, per_page,
+            cache_key=f'admin_count:{digest.hexdigest()}',
+            timeout=ADMIN_COUNT_CACHE_TIMEOUT,
+            orphans=orphans,
+            allow_empty_first_page=allow_empty_first_page,
+        )
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.has_filters():
+            estimate = estimate_row_count(queryset.model, queryset.db)
+            if estimate and estimate >= ADMIN_COUNT_ESTIMATE_THRESHOLD:
+                return estimate
+        return CachedCountPaginator.count.func(self)
+
+
+class CursorPage:
+    """Страница ленты, полученная по курсору."""
+
+    is_cursor = True
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """Keyset-пагинация по паре (поле даты, pk).
+
+    Вместо LIMIT/OFFSET и COUNT(*) каждая страница выбирается условием
+    по позиции последней записи, поэтому время ответа не зависит
+    от глубины страницы.
+    """
+
+    def __init__(self, queryset, per_page, field='pub_date', descending=True):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.field = field
+        self.descending = descending
+
+    @staticmethod
+    def _encode(direction, value, pk):
+        raw = f'{direction}|{value.isoformat()}|{pk}'.encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    def encode_cursor(self, direction, obj):
+        """Кодирует позицию объекта в непрозрачный токен."""
+        return self._encode(direction, getattr(obj, self.field), obj.pk)
+
+    def cursor_ending_at(self, obj):
+        """Курсор страницы, последним элементом которой будет obj."""
+        # Позиция сразу за obj: страница «до неё» включает сам obj.
+        step = -1 if self.descending else 1
+        return self._encode(
+            PREVIOUS, getattr(obj, self.field), obj.pk + step
+        )
+
+    def decode_cursor(self, cursor):
+        """Разбирает токен; для некорректного возвращает (NEXT, None)."""
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            raw = base64.urlsafe_b64decode(padded.encode()).decode()
+            direction, value, pk = raw.split('|')
+            value = parse_datetime(value)
+            pk = int(pk)
+        except (ValueError, TypeError, binascii.Error, UnicodeDecodeError):
+            return NEXT, None
+        if direction not in (NEXT, PREVIOUS) or value is None:
+            return NEXT, None
+        return direction, (value, pk)
+
+    def ordering(self, reverse=False):
+        """Порядок ленты; reverse=True — обратный."""
+        prefix = '-' if self.descending != reverse else ''
+        return (f'{prefix}{self.field}', f'{prefix}pk')
+
+    def _beyond(self, position, reverse=False):
+        """Условие «записи дальше позиции» в выбранном направлении."""
+        value, pk = position
+        lookup = 'lt' if self.descending != reverse else 'gt'
+        return (
+            Q(**{f'{self.field}__{lookup}': value})
+            | Q(**{self.field: value, f'pk__{lookup}': pk})
+        )
+
+    def _has_rows_from(self, position):
+        """Есть ли записи в позиции или после неё.
+
+        Страница по курсору PREVIOUS заканчивается перед позицией,
+        поэтому только так известно, есть ли у неё следующая.
+        """
+        return self.queryset.exclude(
+            self._beyond(position, reverse=True)
+        ).exists()
+
+    def get_page(self, cursor=None):
+        """Возвращает страницу после (или до) позиции из курсора.
+
+        Курсор LAST открывает последнюю страницу с конца выборки.
+        """
+        if cursor == LAST:
+            direction, position = LAST, None
+        elif cursor:
+            direction, position = self.decode_cursor(cursor)
+        else:
+            direction, position = NEXT, None
+        backwards = direction == LAST or (
+            direction == PREVIOUS and position is not None
+        )
+        queryset = self.queryset.order_by(*self.ordering(backwards))
+        if position is not None:
+            queryset = queryset.filter(self._beyond(position, backwards))
+        items = list(queryset[:self.per_page + 1])
+        has_more = len(items) > self.per_page
+        items = items[:self.per_page]
+        if backwards:
+            items.reverse()
+            has_previous = has_more
+            has_next = (
+                direction == PREVIOUS and self._has_rows_from(position)
+            )
+        else:
+            has_next, has_previous = has_more, position is not None
+        if not items:
+            return CursorPage(items)
+        return CursorPage(
+            items,
+            next_cursor=(
+                self.encode_cursor(NEXT, items[-1]) if has_next else None
+            ),
+            previous_cursor=(
+                self.encode_cursor(PREVIOUS, items[0])
+                if has_previous else None
+            ),
+        )
@@ -0,0 +1,10 @@
+from django.template.defaultfilters import linebreaksbr
+
+# Версия правил отрисовки текста. При изменении render_text её нужно
+# увеличить и выполнить команду rerender_texts.
+RENDERER_VERSION = 1
+
+
+def render_text(text):
+    """HTML текста поста или комментария: экранирование и переносы строк."""
+    return linebreaksbr(text, autoescape=True)
@@ -0,0 +1,73 @@
+import random
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+# Имя cookie, закрепляющей пользователя за основной базой после записи
+PRIMARY_PIN_COOKIE = 'primary_pin'
+
+# Модели этих приложений можно читать с реплик. Пользователи и сессии
+# читаются из основной базы: на реплике может не быть только что
+# созданной сессии или сменённого пароля, и пользователь оказался бы
+# разлогинен. Авторы в карточках приходят JOIN-ом вместе с постами.
+REPLICA_APP_LABELS = {'blog'}
+
+_replica_reads = ContextVar('replica_reads', default=False)
+
+
+class ReplicaRouter:
+    """Направляет чтения из отмеченных view на реплики.
+
+    Все записи и чтения вне read_from_replica идут в основную базу.
+    """
+
+    def db_for_read(self, model, **hints):
+        if (
+            _replica_reads.get()
+            and settings.DATABASE_REPLICAS
+            and model._meta.app_label in REPLICA_APP_LABELS
+        ):
+            return random.choice(settings.DATABASE_REPLICAS)
+        return None
+
+    def db_for_write(self, model, **hints):
+        # Объекты, прочитанные с реплики, сохраняем в основную базу.
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if {obj1._state.db, obj2._state.db} <= databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, **hints):
+        # Реплики — снимки основной базы, схему в них не меняем.
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
+
+
+def read_from_replica(view_func):
+    """Читает данные view с реплики, если пользователь не закреплён.
+
+    После POST пользователь получает cookie PRIMARY_PIN_COOKIE и на время
+    REPLICA_LAG_SECONDS читает из основной базы, чтобы сразу увидеть
+    свой пост или комментарий. Ответ, прочитанный с реплики, отмечается
+    в request.replica_reads.
+    """
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        if (
+            request.method not in ('GET', 'HEAD')
+            or PRIMARY_PIN_COOKIE in request.COOKIES
+        ):
+            return view_func(request, *args, **kwargs)
+        request.replica_reads = bool(settings.DATABASE_REPLICAS)
+        token = _replica_reads.set(True)
+        try:
+            return view_func(request, *args, **kwargs)
+        finally:
+            _replica_reads.reset(token)
+    return wrapper
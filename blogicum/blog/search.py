@@ -0,0 +1,144 @@
+import re
+
+from django.db import models
+from django.db.models.functions import Lower
+
+# Сколько слов запроса учитывается при поиске
+MAX_QUERY_TERMS = 10
+
+
+class FullTextIndex:
+    """Полнотекстовый индекс SQLite FTS5 по столбцам таблицы.
+
+    Индекс хранит только термы (external content), данные берутся
+    из исходной таблицы; синхронность поддерживают триггеры.
+    """
+
+    def __init__(self, table, content, columns, rank='bm25()'):
+        self.table = table
+        self.content = content
+        self.columns = columns
+        self.rank = rank
+
+    @property
+    def create_sql(self):
+        """Создание индекса без триггеров."""
+        return (
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} USING fts5('
+            f"{', '.join(self.columns)}, content='{self.content}',"
+            " content_rowid='id',"
+            " tokenize='unicode61 remove_diacritics 2')",
+            f'INSERT INTO {self.table}({self.table}, rank)'
+            f" VALUES ('rank', '{self.rank}')",
+        )
+
+    @property
+    def rebuild_sql(self):
+        return f"INSERT INTO {self.table}({self.table}) VALUES ('rebuild')"
+
+    @property
+    def triggers(self):
+        columns = ', '.join(self.columns)
+        new = ', '.join(f'new.{column}' for column in self.columns)
+        old = ', '.join(f'old.{column}' for column in self.columns)
+        insert = (
+            f'INSERT INTO {self.table}(rowid, {columns})'
+            f' VALUES (new.id, {new});'
+        )
+        delete = (
+            f'INSERT INTO {self.table}({self.table}, rowid, {columns})'
+            f" VALUES ('delete', old.id, {old});"
+        )
+        return {
+            f'{self.table}_insert': (
+                f'CREATE TRIGGER IF NOT EXISTS {self.table}_insert'
+                f' AFTER INSERT ON {self.content} BEGIN {insert} END'
+            ),
+            f'{self.table}_delete': (
+                f'CREATE TRIGGER IF NOT EXISTS {self.table}_delete'
+                f' AFTER DELETE ON {self.content} BEGIN {delete} END'
+            ),
+            f'{self.table}_update': (
+                f'CREATE TRIGGER IF NOT EXISTS {self.table}_update'
+                f' AFTER UPDATE OF {columns} ON {self.content}'
+                f' BEGIN {delete} {insert} END'
+            ),
+        }
+
+
+# Веса bm25 для столбцов title и text: совпадение в заголовке важнее.
+POST_SEARCH_INDEX = FullTextIndex(
+    'blog_post_search', 'blog_post', ('title', 'text'), 'bm25(10.0, 1.0)'
+)
+COMMENT_SEARCH_INDEX = FullTextIndex(
+    'blog_comment_search', 'blog_comment', ('text',)
+)
+SEARCH_INDEXES = (POST_SEARCH_INDEX, COMMENT_SEARCH_INDEX)
+
+# Индекс имён пользователей для поиска по началу имени без учёта регистра;
+# таблица пользователей не принадлежит blog, поэтому он создаётся миграцией
+USERNAME_LOWER_INDEX = models.Index(
+    Lower('username'), name='user_username_lower_idx'
+)
+
+
+def install_search_index(connection, indexes=SEARCH_INDEXES):
+    """Создаёт индексы и триггеры, если их нет.
+
+    Перестройка таблиц в миграциях SQLite удаляет триггеры, поэтому
+    функция вызывается и после каждого migrate. Индекс, у которого
+    не хватало триггеров, заполняется заново. Возвращает список таблиц
+    пересозданных индексов.
+    """
+    if connection.vendor != 'sqlite':
+        return []
+    installed = []
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")
+        existing = {name for name, in cursor.fetchall()}
+        for index in indexes:
+            if existing.issuperset(index.triggers):
+                continue
+            for sql in index.create_sql + tuple(index.triggers.values()):
+                cursor.execute(sql)
+            cursor.execute(index.rebuild_sql)
+            installed.append(index.table)
+    return installed
+
+
+def drop_search_index(connection, indexes=SEARCH_INDEXES):
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for index in indexes:
+            for name in index.triggers:
+                cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+            cursor.execute(f'DROP TABLE IF EXISTS {index.table}')
+
+
+def build_match_query(query, column=None):
+    """Превращает пользовательский ввод в запрос FTS5.
+
+    Каждое слово ищется по префиксу, все слова обязательны. Операторы
+    FTS5 из ввода не используются, поэтому запрос всегда корректен.
+    С column поиск ограничивается одним столбцом индекса.
+    """
+    terms = re.findall(r'\w+', query)[:MAX_QUERY_TERMS]
+    match = ' '.join(f'"{term}"*' for term in terms)
+    if match and column:
+        return f'{{{column}}} : ({match})'
+    return match
+
+
+class SearchDocumentField(models.TextField):
+    """Скрытый столбец FTS5 с именем таблицы — левая часть MATCH."""
+
+
+@SearchDocumentField.register_lookup
+class Match(models.Lookup):
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', lhs_params + rhs_params
@@ -0,0 +1,369 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import Count, F, OuterRef, Q, QuerySet, Subquery
+from django.db.models.functions import Greatest
+from django.db import connections
+from django.db.models.signals import (post_delete, post_migrate, post_save,
+                                      pre_delete, pre_save)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .archive import shift_calendar_day, to_day, uncount_calendar_days
+from .caching import invalidate_feed_counts
+from .feed import (NEXT_ACTIVATION_KEY, refresh_category_visibility,
+                   sync_feed_entries)
+from .models import (CalendarDay, Category, Comment, FeedEntry, Location,
+                     Post)
+from .jobs import IMAGE_VARIANTS_JOB, enqueue_job
+from .pagecache import page_tag, purge_page_tags
+from .search import install_search_index
+
+# Поля поста, от которых зависит его попадание в ленты
+POST_FEED_FIELDS = ('is_visible', 'category_id', 'author_id')
+
+
+@receiver(post_save, sender=Comment)
+def increment_comment_count(sender, instance, created, raw=False, **kwargs):
+    """Увеличивает счётчик комментариев поста при добавлении комментария."""
+    if created and not raw:
+        for model in (Post, FeedEntry):
+            model.objects.filter(pk=instance.post_id).update(
+                comment_count=F('comment_count') + 1
+            )
+
+
+def _get_origin_model(origin):
+    """Модель объекта или queryset, с которого началось удаление."""
+    return origin.model if isinstance(origin, QuerySet) else type(origin)
+
+
+def _is_cascade(origin):
+    """Удаление начато с поста или пользователя, а не с комментариев.
+
+    Комментарии такого удаления учитываются разом в pre_delete поста
+    и пользователя, а не отдельным запросом на каждый.
+    """
+    return _get_origin_model(origin) in (Post, get_user_model())
+
+
+@receiver(post_delete, sender=Comment)
+def decrement_comment_count(sender, instance, origin=None, **kwargs):
+    """Уменьшает счётчик при удалении комментария."""
+    if _is_cascade(origin):
+        return
+    for model in (Post, FeedEntry):
+        model.objects.filter(
+            pk=instance.post_id, comment_count__gt=0
+        ).update(comment_count=F('comment_count') - 1)
+
+
+@receiver(post_save, sender=Comment)
+def count_comment_calendar_day(sender, instance, created, raw=False,
+                               **kwargs):
+    if created and not raw:
+        shift_calendar_day(CalendarDay.COMMENTS, instance.created_at, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def uncount_comment_calendar_day(sender, instance, origin=None, **kwargs):
+    if not _is_cascade(origin):
+        shift_calendar_day(CalendarDay.COMMENTS, instance.created_at, -1)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def purge_comment_post_pages(sender, instance, raw=False, origin=None,
+                             **kwargs):
+    """Сбрасывает страницы с постом: на них комментарии и их число."""
+    if not raw and not _is_cascade(origin):
+        purge_page_tags(page_tag('post', instance.post_id))
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def touch_comment_post(sender, instance, raw=False, origin=None, **kwargs):
+    """Меняет время изменения поста: комментарии выводятся на его странице."""
+    if not raw and not _is_cascade(origin):
+        Post.objects.filter(pk=instance.post_id).update(
+            updated_at=timezone.now()
+        )
+
+
+@receiver(pre_delete, sender=Post)
+def uncount_deleted_post_comments(sender, instance, **kwargs):
+    """Вычитает из календаря комментарии удаляемого поста."""
+    uncount_calendar_days(
+        CalendarDay.COMMENTS, Comment.objects.filter(post=instance)
+    )
+
+
+@receiver(pre_delete, sender=get_user_model())
+def uncount_deleted_user_comments(sender, instance, **kwargs):
+    """Учитывает удаление комментариев пользователя к чужим постам.
+
+    Посты пользователя удаляются вместе с ним, их комментарии вычитает
+    uncount_deleted_post_comments.
+    """
+    comments = Comment.objects.filter(author=instance).exclude(
+        post__author=instance
+    )
+    uncount_calendar_days(CalendarDay.COMMENTS, comments)
+    post_ids = list(comments.values_list('post', flat=True).distinct())
+    if not post_ids:
+        return
+    removed = Subquery(
+        comments.filter(post=OuterRef('pk'))
+        .values('post')
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    comment_count = Greatest(F('comment_count') - removed, 0)
+    Post.objects.filter(pk__in=post_ids).update(
+        comment_count=comment_count, updated_at=timezone.now()
+    )
+    FeedEntry.objects.filter(pk__in=post_ids).update(
+        comment_count=comment_count
+    )
+    purge_page_tags(*(page_tag('post', pk) for pk in post_ids))
+
+
+@receiver(pre_save, sender=Post)
+def remember_post_feed_state(sender, instance, raw=False, **kwargs):
+    """Запоминает, в каких лентах и за какой день пост был до сохранения."""
+    instance._previous_feed_state = None
+    instance._previous_pub_date = None
+    if instance.pk is not None and not raw:
+        state = (
+            Post.objects.filter(pk=instance.pk)
+            .values('pub_date', *POST_FEED_FIELDS)
+            .first()
+        )
+        if state is not None:
+            instance._previous_pub_date = state.pop('pub_date')
+            instance._previous_feed_state = state
+
+
+@receiver(post_save, sender=Post)
+def sync_post_feed_entry(sender, instance, raw=False, **kwargs):
+    """Добавляет, обновляет или убирает пост из материализованной ленты."""
+    if not raw:
+        sync_feed_entries([instance.pk])
+        cache.delete(NEXT_ACTIVATION_KEY)
+
+
+@receiver(post_save, sender=Post)
+def queue_image_variants(sender, instance, raw=False, **kwargs):
+    """Ставит в очередь построение копий нового изображения поста."""
+    if not raw and getattr(instance, '_image_uploaded', False):
+        enqueue_job(IMAGE_VARIANTS_JOB, post_id=instance.pk)
+
+
+@receiver(post_save, sender=Post)
+def invalidate_post_feed_counts(sender, instance, **kwargs):
+    """Сбрасывает размеры лент, если пост в них появился или пропал."""
+    previous = getattr(instance, '_previous_feed_state', None) or {}
+    current = {field: getattr(instance, field) for field in POST_FEED_FIELDS}
+    if previous == current:
+        return
+    invalidate_feed_counts(
+        category_ids={current['category_id'], previous.get('category_id')},
+        author_ids={current['author_id'], previous.get('author_id')} - {None},
+    )
+
+
+@receiver(post_save, sender=Post)
+def count_post_calendar_day(sender, instance, created, raw=False, **kwargs):
+    """Переносит пост в календаре при добавлении и смене даты."""
+    if raw:
+        return
+    previous = getattr(instance, '_previous_pub_date', None)
+    if created:
+        shift_calendar_day(CalendarDay.POSTS, instance.pub_date, 1)
+    elif previous and to_day(previous) != to_day(instance.pub_date):
+        shift_calendar_day(CalendarDay.POSTS, previous, -1)
+        shift_calendar_day(CalendarDay.POSTS, instance.pub_date, 1)
+
+
+@receiver(post_delete, sender=Post)
+def uncount_post_calendar_day(sender, instance, origin=None, **kwargs):
+    # Посты удаляемого пользователя вычитает uncount_deleted_user_posts.
+    if _get_origin_model(origin) is not get_user_model():
+        shift_calendar_day(CalendarDay.POSTS, instance.pub_date, -1)
+
+
+@receiver(pre_delete, sender=get_user_model())
+def uncount_deleted_user_posts(sender, instance, **kwargs):
+    uncount_calendar_days(
+        CalendarDay.POSTS, Post.objects.filter(author=instance)
+    )
+
+
+@receiver(post_delete, sender=Post)
+def invalidate_deleted_post_feed_counts(sender, instance, **kwargs):
+    """Сбрасывает размеры лент удалённого поста."""
+    invalidate_feed_counts(
+        category_ids=[instance.category_id],
+        author_ids=[instance.author_id],
+    )
+
+
+def _get_post_list_tags(*states):
+    tags = {page_tag('feed')}
+    for state in states:
+        tags.add(page_tag('category_feed', state.get('category_id')))
+        tags.add(page_tag('author_feed', state.get('author_id')))
+    return tags
+
+
+@receiver(post_save, sender=Post)
+def purge_post_pages(sender, instance, raw=False, **kwargs):
+    """Сбрасывает страницы с постом, а при переносе — и его ленты."""
+    if raw:
+        return
+    tags = {page_tag('post', instance.pk)}
+    previous = getattr(instance, '_previous_feed_state', None) or {}
+    current = {field: getattr(instance, field) for field in POST_FEED_FIELDS}
+    if (
+        previous != current
+        or getattr(instance, '_previous_pub_date', None) != instance.pub_date
+    ):
+        tags |= _get_post_list_tags(current, previous)
+    purge_page_tags(*tags)
+
+
+@receiver(post_delete, sender=Post)
+def purge_deleted_post_pages(sender, instance, **kwargs):
+    purge_page_tags(
+        page_tag('post', instance.pk),
+        *_get_post_list_tags({
+            'category_id': instance.category_id,
+            'author_id': instance.author_id,
+        }),
+    )
+
+
+def _invalidate_category_feed_counts(category):
+    invalidate_feed_counts(
+        category_ids=[category.pk],
+        author_ids=Post.objects.filter(category=category)
+        .values_list('author_id', flat=True)
+        .distinct(),
+    )
+
+
+@receiver(pre_save, sender=Category)
+def remember_category_state(sender, instance, raw=False, **kwargs):
+    """Запоминает, была ли категория опубликована до сохранения."""
+    instance._was_published = (
+        instance.pk is not None and not raw
+        and Category.objects.filter(pk=instance.pk, is_published=True)
+        .exists()
+    )
+
+
+@receiver(post_save, sender=Category)
+def sync_category_posts(sender, instance, created, raw=False, **kwargs):
+    """Переносит изменения категории в видимость постов и ленту."""
+    if raw or created:
+        return
+    if getattr(instance, '_was_published', False) != instance.is_published:
+        refresh_category_visibility(instance)
+        _invalidate_category_feed_counts(instance)
+        purge_page_tags(page_tag('feed'))
+    elif instance.is_published:
+        FeedEntry.objects.filter(category=instance).update(
+            category_title=instance.title,
+            category_slug=instance.slug,
+        )
+
+
+@receiver(pre_delete, sender=Category)
+def hide_deleted_category_posts(sender, instance, **kwargs):
+    """Посты удаляемой категории пропадают из лент."""
+    Post.objects.filter(category=instance).update(is_visible=False)
+    _invalidate_category_feed_counts(instance)
+    purge_page_tags(page_tag('feed'))
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def purge_category_pages(sender, instance, raw=False, **kwargs):
+    if not raw:
+        purge_page_tags(
+            page_tag('category', instance.pk),
+            page_tag('category_feed', instance.pk),
+        )
+
+
+@receiver(post_save, sender=Location)
+def sync_location_feed_entries(sender, instance, raw=False, **kwargs):
+    """Переносит название и публикацию места в записи ленты."""
+    if not raw:
+        FeedEntry.objects.filter(location=instance).update(
+            location_name=instance.name,
+            location_is_published=instance.is_published,
+        )
+
+
+@receiver(post_save, sender=Location)
+@receiver(post_delete, sender=Location)
+def purge_location_pages(sender, instance, raw=False, **kwargs):
+    if not raw:
+        purge_page_tags(page_tag('location', instance.pk))
+
+
+@receiver(pre_save, sender=get_user_model())
+def remember_username(sender, instance, raw=False, update_fields=None,
+                      **kwargs):
+    instance._previous_username = None
+    if raw or (update_fields is not None and 'username' not in update_fields):
+        return
+    instance._previous_username = (
+        sender.objects.filter(pk=instance.pk)
+        .values_list('username', flat=True)
+        .first()
+    )
+
+
+@receiver(post_save, sender=get_user_model())
+def touch_renamed_author_posts(sender, instance, created, raw=False,
+                               **kwargs):
+    """Меняет время изменения постов, где выводится старое имя автора."""
+    previous = getattr(instance, '_previous_username', None)
+    if raw or created or previous in (None, instance.username):
+        return
+    Post.objects.filter(
+        Q(author=instance)
+        | Q(pk__in=Comment.objects.filter(author=instance).values('post'))
+    ).update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=get_user_model())
+def sync_author_feed_entries(sender, instance, raw=False, update_fields=None,
+                             **kwargs):
+    """Переносит имя пользователя в записи ленты его постов."""
+    if raw or (update_fields is not None and 'username' not in update_fields):
+        return
+    FeedEntry.objects.filter(author=instance).exclude(
+        author_username=instance.username
+    ).update(author_username=instance.username)
+
+
+@receiver(post_save, sender=get_user_model())
+def purge_user_pages(sender, instance, raw=False, update_fields=None,
+                     **kwargs):
+    """Сбрасывает профиль и страницы с постами и комментариями автора."""
+    # Вход пользователя сохраняет только last_login.
+    if raw or update_fields == frozenset({'last_login'}):
+        return
+    purge_page_tags(
+        page_tag('user', instance.pk),
+        page_tag('author_feed', instance.pk),
+    )
+
+
+@receiver(post_migrate)
+def restore_search_index(sender, using, **kwargs):
+    """Возвращает триггеры поиска, если миграция перестроила blog_post."""
+    if sender.name == 'blog':
+        install_search_index(connections[using])
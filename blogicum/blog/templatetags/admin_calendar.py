@@ -0,0 +1,129 @@
+from django.contrib.admin.templatetags.admin_list import date_hierarchy
+from django.contrib.admin.templatetags.base import InclusionAdminNode
+from django.contrib.admin.views.main import (IS_FACETS_VAR, IS_POPUP_VAR,
+                                             ORDER_VAR, SEARCH_VAR,
+                                             TO_FIELD_VAR)
+from django.template import Library
+from django.utils import formats
+from django.utils.text import capfirst
+from django.utils.translation import gettext as _
+
+from blog.archive import CALENDAR_SOURCES, get_calendar, get_calendar_range
+
+register = Library()
+
+# Параметры списка, которые не меняют набор записей
+NEUTRAL_PARAMS = {ORDER_VAR, IS_POPUP_VAR, TO_FIELD_VAR, IS_FACETS_VAR}
+
+
+def get_calendar_kind(cl):
+    """Вид счётчика календаря для иерархии дат списка или None."""
+    for kind, (model, field) in CALENDAR_SOURCES.items():
+        if cl.model is model and cl.date_hierarchy == field:
+            return kind
+    return None
+
+
+def get_date_lookups(cl):
+    """Год, месяц и день из параметров списка или None.
+
+    None означает, что список отфильтрован не только по дате и счётчики
+    календаря к нему неприменимы.
+    """
+    field_generic = f'{cl.date_hierarchy}__'
+    lookups = {}
+    for name, value in cl.params.items():
+        if name in NEUTRAL_PARAMS or (name == SEARCH_VAR and not value):
+            continue
+        if not name.startswith(field_generic):
+            return None
+        lookups[name.removeprefix(field_generic)] = value
+    try:
+        return tuple(
+            int(lookups[part]) if part in lookups else None
+            for part in ('year', 'month', 'day')
+        )
+    except ValueError:
+        return None
+
+
+def calendar_hierarchy(cl):
+    """Навигация по датам из счётчиков CalendarDay.
+
+    Стандартная навигация выполняет по списку SELECT DISTINCT с
+    усечением даты, что на больших таблицах означает полный проход.
+    Для списка без фильтров и поиска годы, месяцы и дни берутся из
+    заранее посчитанного календаря, иначе — стандартным способом.
+    """
+    kind = get_calendar_kind(cl)
+    lookups = get_date_lookups(cl) if kind else None
+    if lookups is None:
+        return date_hierarchy(cl)
+    year, month, day = lookups
+    year_field = f'{cl.date_hierarchy}__year'
+    month_field = f'{cl.date_hierarchy}__month'
+    day_field = f'{cl.date_hierarchy}__day'
+
+    def link(filters):
+        return cl.get_query_string(filters, [f'{cl.date_hierarchy}__'])
+
+    if year is None and month is None and day is None:
+        first, last = get_calendar_range(kind)
+        if first and first.year == last.year:
+            year = first.year
+            if first.month == last.month:
+                month = first.month
+    if year and month and day:
+        return date_hierarchy(cl)
+    if year and month:
+        return {
+            'show': True,
+            'back': {'link': link({year_field: year}), 'title': str(year)},
+            'choices': [
+                {
+                    'link': link({
+                        year_field: year,
+                        month_field: month,
+                        day_field: date.day,
+                    }),
+                    'title': capfirst(
+                        formats.date_format(date, 'MONTH_DAY_FORMAT')
+                    ),
+                }
+                for date, _count in get_calendar(kind, year, month)
+            ],
+        }
+    if year:
+        return {
+            'show': True,
+            'back': {'link': link({}), 'title': _('All dates')},
+            'choices': [
+                {
+                    'link': link({year_field: year, month_field: date.month}),
+                    'title': capfirst(
+                        formats.date_format(date, 'YEAR_MONTH_FORMAT')
+                    ),
+                }
+                for date, _count in get_calendar(kind, year)
+            ],
+        }
+    return {
+        'show': True,
+        'back': None,
+        'choices': [
+            {'link': link({year_field: str(date.year)}),
+             'title': str(date.year)}
+            for date, _count in get_calendar(kind)
+        ],
+    }
+
+
+@register.tag(name='calendar_hierarchy')
+def calendar_hierarchy_tag(parser, token):
+    return InclusionAdminNode(
+        parser,
+        token,
+        func=calendar_hierarchy,
+        template_name='date_hierarchy.html',
+        takes_context=False,
+    )
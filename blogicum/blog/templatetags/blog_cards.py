@@ -0,0 +1,11 @@
+from django import template
+
+from blog.caching import render_post_cards
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_cards(posts):
+    """Карточки постов страницы из кеша фрагментов."""
+    return render_post_cards(list(posts))
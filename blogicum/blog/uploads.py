@@ -0,0 +1,110 @@
+import warnings
+from functools import wraps
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.uploadhandler import (SkipFile,
+                                             TemporaryFileUploadHandler)
+from django.template.defaultfilters import filesizeformat
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
+from PIL import Image
+
+from .constants import IMAGE_HEADER_MAX_BYTES
+
+
+def get_image_pixels(file):
+    """Число пикселей по заголовку изображения или None.
+
+    Image.open читает только заголовок, пиксели не декодируются.
+    None — данных недостаточно или это не изображение. Как и
+    ImageField.to_python, ловим любое исключение: на обрезанных
+    и странных заголовках Pillow бросает и ValueError.
+    """
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', Image.DecompressionBombWarning)
+            with Image.open(file) as image:
+                width, height = image.size
+    except Image.DecompressionBombError:
+        # Больше предела Pillow, а значит, и любого разумного.
+        return float('inf')
+    except Exception:
+        return None
+    return width * height
+
+
+class ImageUploadHandler(TemporaryFileUploadHandler):
+    """Пишет загружаемые файлы сразу во временный файл на диске.
+
+    Файл больше IMAGE_UPLOAD_MAX_BYTES или изображение больше
+    IMAGE_UPLOAD_MAX_PIXELS отбрасывается, как только это становится
+    известно: по Content-Length части запроса, по числу принятых байтов
+    или по размерам из заголовка изображения. Причина отказа
+    записывается в request.upload_errors по имени поля формы.
+    """
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.max_bytes = settings.IMAGE_UPLOAD_MAX_BYTES
+        self.max_pixels = settings.IMAGE_UPLOAD_MAX_PIXELS
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.header = b''
+        self.pixels = None
+        if self.content_length and self.content_length > self.max_bytes:
+            self.reject(self.get_size_error())
+
+    def receive_data_chunk(self, raw_data, start):
+        if start + len(raw_data) > self.max_bytes:
+            self.reject(self.get_size_error())
+        if self.pixels is None and len(self.header) < IMAGE_HEADER_MAX_BYTES:
+            self.header += raw_data
+            self.pixels = get_image_pixels(BytesIO(self.header))
+            if self.pixels is not None and self.pixels > self.max_pixels:
+                self.reject(self.get_pixels_error())
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        self.header = b''
+        if self.pixels is None:
+            # Заголовок не уместился в IMAGE_HEADER_MAX_BYTES.
+            self.file.seek(0)
+            self.pixels = get_image_pixels(self.file)
+            if self.pixels is not None and self.pixels > self.max_pixels:
+                self.file.close()
+                self.add_error(self.get_pixels_error())
+                return None
+        return super().file_complete(file_size)
+
+    def get_size_error(self):
+        return f'Размер файла больше {filesizeformat(self.max_bytes)}.'
+
+    def get_pixels_error(self):
+        return f'Изображение больше {self.max_pixels / 10**6:g} Мп.'
+
+    def add_error(self, message):
+        self.request.upload_errors[self.field_name] = message
+
+    def reject(self, message):
+        """Отбрасывает файл; остаток его данных парсер пропустит."""
+        self.add_error(message)
+        raise SkipFile
+
+
+def limit_image_uploads(view_func):
+    """Принимает файлы запроса к view через ImageUploadHandler.
+
+    Обработчики загрузки нельзя заменить после чтения request.POST,
+    а его читает CsrfViewMiddleware, поэтому CSRF-токен проверяется
+    уже после замены.
+    """
+    protected_view = csrf_protect(view_func)
+
+    @csrf_exempt
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        request.upload_errors = {}
+        request.upload_handlers = [ImageUploadHandler(request)]
+        return protected_view(request, *args, **kwargs)
+    return wrapper
@@ -8,6 +8,7 @@ urlpatterns = [
     path("", views.index, name="index"),
     path("category/<slug:category_slug>/",
          views.category_posts, name="category_posts"),
+    path("search/", views.search, name="search"),
 
 
     path("profile/edit/",
@@ -23,6 +24,9 @@ urlpatterns = [
     path("posts/<int:post_id>/",
          views.post_detail, name="post_detail"),
 
+    path("posts/<int:post_id>/comments/",
+         views.post_comments,
+         name='post_comments'),
     path("posts/<int:post_id>/comment/",
          views.add_comment,
          name='add_comment'),
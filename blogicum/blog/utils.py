@@ -1,41 +1,198 @@
-from django.utils import timezone
+from django.conf import settings
 from django.core.paginator import Paginator
-from django.db.models import Count
+from django.db import connections, router
+from django.db.models import Count, F, OuterRef, Q, Subquery, Value
+from django.shortcuts import get_object_or_404
+from django.db.models.functions import Coalesce, Greatest
 
-from .models import Post, Comment
+from .constants import (COMMENTS_PER_PAGE, MAX_OFFSET_PAGE,
+                        PAGE_RANGE_ON_EACH_SIDE, PAGE_RANGE_ON_ENDS)
+from .feed import get_feed_cache_timeout
+from .models import FeedEntry, Post, Comment
+from .paginators import (LAST, NEXT, CachedCountPaginator, CursorPaginator,
+                         DeepPageRedirect, get_page_window)
+from .search import build_match_query
 
 
 def get_base_post():
     """Возвращает базовый queryset опубликованных постов."""
-    return Post.objects.filter(
-        is_published=True,
-        category__is_published=True,
-        pub_date__lte=timezone.now()
-    ).order_by('-pub_date')
-
-
-def get_paginated_post(request, queryset, per_page):
-    """Создает пагинацию для queryset постов."""
-    paginator = Paginator(queryset, per_page)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    return Post.objects.filter(is_visible=True).order_by('-pub_date')
+
+
+def get_page_number(request):
+    try:
+        return int(request.GET.get('page', 1))
+    except (TypeError, ValueError):
+        return 1
+
+
+def get_deep_page_url(request, paginator, number, cursor_paginator=None):
+    """Адрес, по которому открывается страница дальше MAX_OFFSET_PAGE.
+
+    С курсорами это последняя страница или страница сразу за
+    MAX_OFFSET_PAGE, без них — сама MAX_OFFSET_PAGE.
+    """
+    params = request.GET.copy()
+    del params['page']
+    if cursor_paginator is None:
+        params['page'] = MAX_OFFSET_PAGE
+    elif number >= paginator.num_pages:
+        params['cursor'] = LAST
+    else:
+        boundary = paginator.object_list[
+            MAX_OFFSET_PAGE * paginator.per_page - 1]
+        params['cursor'] = cursor_paginator.encode_cursor(NEXT, boundary)
+    return f'?{params.urlencode()}'
+
+
+def get_paginated_post(request, queryset, per_page, cursor=False,
+                       count_key=None):
+    """Создает пагинацию для queryset постов.
+
+    Если view разрешает курсорный режим (cursor=True) и в запросе передан
+    параметр cursor, страница выбирается по ключу (pub_date, id)
+    без OFFSET и COUNT. С count_key общее число постов берётся из кеша.
+
+    Номера страниц выводятся окном вокруг текущей (page_obj.page_range),
+    а страницы дальше MAX_OFFSET_PAGE по OFFSET не выбираются:
+    view с redirect_deep_pages перенаправляет на них по курсору.
+    """
+    def paginate(queryset, cursor_paginator=None):
+        if count_key is None:
+            paginator = Paginator(queryset, per_page)
+        else:
+            paginator = CachedCountPaginator(
+                queryset, per_page, count_key,
+                timeout=get_feed_cache_timeout(
+                    settings.FEED_COUNT_CACHE_TIMEOUT))
+        number = get_page_number(request)
+        if number > MAX_OFFSET_PAGE:
+            raise DeepPageRedirect(get_deep_page_url(
+                request, paginator, number, cursor_paginator))
+        page_obj = paginator.get_page(number)
+        num_pages = min(paginator.num_pages, MAX_OFFSET_PAGE)
+        page_obj.page_range = get_page_window(
+            page_obj.number, num_pages,
+            PAGE_RANGE_ON_EACH_SIDE, PAGE_RANGE_ON_ENDS)
+        page_obj.next_query = (
+            f'page={page_obj.number + 1}'
+            if page_obj.number < num_pages else None
+        )
+        if paginator.num_pages == num_pages:
+            page_obj.last_query = f'page={num_pages}'
+        else:
+            page_obj.last_query = (
+                f'cursor={LAST}' if cursor_paginator else None
+            )
+        return page_obj
+
+    if not cursor:
+        return paginate(queryset)
+    cursor_paginator = CursorPaginator(queryset, per_page)
+    if 'cursor' in request.GET:
+        return cursor_paginator.get_page(request.GET.get('cursor'))
+    page_obj = paginate(
+        queryset.order_by(*cursor_paginator.ordering()), cursor_paginator)
+    # Переход «вперёд» с нумерованной страницы тоже идёт по курсору.
+    page_obj.next_cursor = (
+        cursor_paginator.encode_cursor(NEXT, page_obj[-1])
+        if page_obj.has_next() else None
+    )
+    if page_obj.next_cursor:
+        page_obj.next_query = f'cursor={page_obj.next_cursor}'
+    return page_obj
+
+
+def get_feed():
+    """Возвращает видимые записи материализованной ленты."""
+    return FeedEntry.objects.all()
+
+
+def get_feed_page(request, queryset, per_page, count_key):
+    """Пагинирует записи ленты и превращает их в посты для карточек."""
+    page_obj = get_paginated_post(
+        request, queryset, per_page, cursor=True, count_key=count_key)
+    page_obj.object_list = [entry.as_post() for entry in page_obj]
     return page_obj
 
 
 def get_post_queryset():
     """Возвращает оптимизированный queryset постов"""
-    return Post.objects.select_related('author',
-                                       'category',
-                                       'location').annotate(
-                                           comment_count=Count('comments')
-    )
+    return Post.objects.select_related('author', 'category', 'location')
 
 
 def optimize_post_queryset(queryset):
-    """Оптимизирует queryset постов с select_related и annotate."""
-    return queryset.select_related('author', 'category', 'location').annotate(
-        comment_count=Count('comments')
+    """Оптимизирует queryset постов с select_related."""
+    return queryset.select_related('author', 'category', 'location')
+
+
+def search_posts(query):
+    """Видимые посты по поисковому запросу, самые релевантные первыми.
+
+    На SQLite используется полнотекстовый индекс FTS5, на других базах —
+    поиск подстрок в заголовке и тексте.
+    """
+    match = build_match_query(query)
+    if not match:
+        return Post.objects.none()
+    posts = optimize_post_queryset(get_base_post()).defer('text')
+    if connections[router.db_for_read(Post)].vendor != 'sqlite':
+        for term in match.split():
+            term = term.strip('"*')
+            posts = posts.filter(
+                Q(title__icontains=term) | Q(text__icontains=term)
+            )
+        return posts
+    return posts.filter(search_entry__document__match=match).annotate(
+        rank=F('search_entry__rank')
+    ).order_by('rank', '-pub_date')
+
+
+def get_post_for_user(user, post_id):
+    """Возвращает видимый пост или скрытый пост автора одним запросом."""
+    visible = Q(is_visible=True)
+    if user.is_authenticated:
+        visible |= Q(author=user)
+    return get_object_or_404(get_post_queryset().filter(visible, id=post_id))
+
+
+def get_post_version(post):
+    """Версия страницы поста: наибольшее время изменения поста,
+    его категории и места.
+
+    Время изменения поста обновляют и сигналы комментариев
+    и переименования авторов.
+    """
+    related = (post.category, post.location)
+    return max(
+        post.updated_at,
+        *(obj.updated_at for obj in related if obj is not None),
+    ).isoformat()
+
+
+def get_post_etag(request, post_id):
+    """Версия видимого поста для условного GET анонимного читателя.
+
+    Тот же расчёт, что в get_post_version, одним запросом по первичному
+    ключу. Без If-None-Match сравнивать не с чем, и запрос не нужен:
+    ETag ставит сама страница.
+    """
+    if (
+        request.user.is_authenticated
+        or 'HTTP_IF_NONE_MATCH' not in request.META
+    ):
+        return None
+    updated_at = (
+        Post.objects.filter(pk=post_id, is_visible=True)
+        .annotate(version=Greatest(
+            'updated_at',
+            Coalesce('category__updated_at', 'updated_at'),
+            Coalesce('location__updated_at', 'updated_at'),
+        ))
+        .values_list('version', flat=True)
+        .first()
     )
+    return updated_at and updated_at.isoformat()
 
 
 def get_post_comments(post):
@@ -45,3 +202,29 @@ def get_post_comments(post):
         .select_related('author')
         .order_by('created_at')
     )
+
+
+def get_comment_paginator(post):
+    """Курсорный пагинатор комментариев поста по (created_at, id)."""
+    return CursorPaginator(
+        get_post_comments(post), COMMENTS_PER_PAGE,
+        field='created_at', descending=False)
+
+
+def get_comments_page(request, post):
+    """Страница комментариев поста по курсору из параметра comments."""
+    return get_comment_paginator(post).get_page(request.GET.get('comments'))
+
+
+def get_comment_count_subquery():
+    """Подзапрос с фактическим числом комментариев поста."""
+    return Coalesce(
+        Subquery(
+            Comment.objects.filter(post=OuterRef('pk'))
+            .order_by()
+            .values('post')
+            .annotate(total=Count('pk'))
+            .values('total')
+        ),
+        Value(0),
+    )
@@ -1,58 +1,92 @@
 from django.shortcuts import get_object_or_404, render, redirect
-from django.utils import timezone
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
 from django.urls import reverse
 from django.http import Http404
+from django.utils.http import quote_etag, urlencode
+from django.views.decorators.http import condition
 
+from .caching import get_feed_count_key
 from .constants import POSTS_ON_MAIN, POSTS_PER_PAGE
 from .models import Category, Post, Comment
 from .utils import (get_base_post,
+                    get_feed,
+                    get_feed_page,
                     get_paginated_post,
                     get_post_queryset,
                     optimize_post_queryset,
-                    get_post_comments)
+                    get_comment_paginator,
+                    get_comments_page,
+                    get_post_etag,
+                    get_post_for_user,
+                    get_post_version,
+                    search_posts)
 from .forms import PostForm, EditUserForm, CommentForm
+from .pagecache import (cache_anonymous_page, get_page_etag, get_post_tags,
+                        page_tag, tag_page)
+from .paginators import redirect_deep_pages
+from .routers import read_from_replica
+from .uploads import limit_image_uploads
 
 
+@cache_anonymous_page
+@redirect_deep_pages
+@read_from_replica
+@condition(etag_func=get_page_etag)
 def index(request):
     """Главная страница с опубликованными постами."""
-    qs = optimize_post_queryset(get_base_post()).order_by('-pub_date')
-    page_obj = get_paginated_post(request, qs, POSTS_ON_MAIN)
+    page_obj = get_feed_page(
+        request, get_feed(), POSTS_ON_MAIN, get_feed_count_key('index'))
+    tag_page(request, page_tag('feed'), *get_post_tags(page_obj))
     return render(request, "blog/index.html", {'page_obj': page_obj})
 
 
+@cache_anonymous_page
+@read_from_replica
+@condition(etag_func=get_post_etag)
 def post_detail(request, post_id):
-    """Детальная страница поста с комментариями."""
-    post = get_post_queryset().filter(
-        id=post_id,
-        is_published=True,
-        category__is_published=True,
-        pub_date__lte=timezone.now()
-    ).first()
-
-    # Если не найден опубликованный пост
-    if not post and request.user.is_authenticated:
-        post = get_post_queryset().filter(
-            id=post_id,
-            author=request.user
-        ).first()
-
-    if not post:
-        raise Http404
-    comments = (
-        Comment.objects.filter(post=post)
-        .select_related('author')
-        .order_by('created_at')
+    """Детальная страница поста с первой страницей комментариев."""
+    post = get_post_for_user(request.user, post_id)
+    comments = get_comments_page(request, post)
+    tag_page(
+        request,
+        *get_post_tags([post]),
+        *(page_tag('user', comment.author_id) for comment in comments),
     )
     form = CommentForm()
-    return render(
+    response = render(
         request,
         "blog/detail.html",
-        {"post": post, 'comments': comments, 'form': form}
+        {
+            'post': post,
+            'comments': comments,
+            'form': form,
+        }
+    )
+    if not request.user.is_authenticated:
+        response['ETag'] = quote_etag(get_post_version(post))
+    return response
+
+
+@read_from_replica
+def post_comments(request, post_id):
+    """Фрагмент со следующей страницей комментариев для «Показать ещё»."""
+    post = get_post_for_user(request.user, post_id)
+    return render(
+        request,
+        "includes/comments.html",
+        {
+            'post': post,
+            'comments': get_comments_page(request, post),
+            'fragment': True,
+        }
     )
 
 
+@cache_anonymous_page
+@redirect_deep_pages
+@read_from_replica
+@condition(etag_func=get_page_etag)
 def category_posts(request, category_slug):
     """Страница постов определенной категории."""
     category = get_object_or_404(
@@ -61,16 +95,46 @@ def category_posts(request, category_slug):
             is_published=True
         )
     )
-    qs = optimize_post_queryset(
-        get_base_post().filter(category=category)
-    ).order_by('-pub_date')
-    page_obj = get_paginated_post(request, qs, POSTS_PER_PAGE)
+    page_obj = get_feed_page(
+        request,
+        get_feed().filter(category=category),
+        POSTS_PER_PAGE,
+        get_feed_count_key('category', category.id))
+    tag_page(
+        request,
+        page_tag('category', category.id),
+        page_tag('category_feed', category.id),
+        *get_post_tags(page_obj),
+    )
     return render(
         request,
         "blog/category.html",
         {'category': category, 'page_obj': page_obj})
 
 
+@redirect_deep_pages
+@read_from_replica
+def search(request):
+    """Поиск по заголовкам и текстам опубликованных постов."""
+    query = request.GET.get('q', '').strip()
+    page_obj = get_paginated_post(
+        request, search_posts(query), POSTS_PER_PAGE)
+    return render(
+        request,
+        'blog/search.html',
+        {
+            'query': query,
+            'page_obj': page_obj,
+            # Параметры, которые пагинатор сохраняет в ссылках на страницы.
+            'page_query': urlencode({'q': query}) + '&',
+        },
+    )
+
+
+@cache_anonymous_page
+@redirect_deep_pages
+@read_from_replica
+@condition(etag_func=get_page_etag)
 def profile(request, username):
     """Страница профиля пользователя с его постами."""
     author = get_object_or_404(get_user_model(), username=username)
@@ -78,12 +142,22 @@ def profile(request, username):
     if is_owner:
         qs = (get_post_queryset()
               .filter(author=author)
+              .defer('text')
               .order_by('-pub_date'))
+        count_key = get_feed_count_key('author', author.id, 'all')
     else:
         qs = optimize_post_queryset(
             get_base_post().filter(author=author)
-        )
-    page_obj = get_paginated_post(request, qs, POSTS_PER_PAGE)
+        ).defer('text')
+        count_key = get_feed_count_key('author', author.id)
+    page_obj = get_paginated_post(
+        request, qs, POSTS_PER_PAGE, cursor=True, count_key=count_key)
+    tag_page(
+        request,
+        page_tag('user', author.id),
+        page_tag('author_feed', author.id),
+        *get_post_tags(page_obj),
+    )
     context = {
         'author': author,
         'is_owner': is_owner,
@@ -104,9 +178,11 @@ def edit_profile(request):
 
 
 @login_required
+@limit_image_uploads
 def create_post(request):
     """Создание нового поста."""
-    form = PostForm(request.POST or None, request.FILES)
+    form = PostForm(request.POST or None, request.FILES,
+                    upload_errors=request.upload_errors)
     if request.method == 'POST' and form.is_valid():
         post = form.save(commit=False)
         post.author = request.user
@@ -116,12 +192,14 @@ def create_post(request):
 
 
 @login_required
+@limit_image_uploads
 def edit_post(request, post_id):
     """Редактирование существующего поста."""
     post = get_object_or_404(Post, pk=post_id)
     if post.author != request.user:
         return redirect('blog:post_detail', post_id=post_id)
-    form = PostForm(request.POST or None, request.FILES or None, instance=post)
+    form = PostForm(request.POST or None, request.FILES or None,
+                    instance=post, upload_errors=request.upload_errors)
     if request.method == 'POST' and form.is_valid():
         form.save()
         return redirect('blog:post_detail', post_id=post.id)
@@ -151,8 +229,10 @@ def add_comment(request, post_id):
         comment.author = request.user
         comment.save()
         url = reverse('blog:post_detail', kwargs={'post_id': post.id})
-        return redirect(f'{url}#comment_{comment.id}')
-    comments = get_post_comments(post)
+        # Открываем ту страницу комментариев, которая заканчивается новым.
+        cursor = get_comment_paginator(post).cursor_ending_at(comment)
+        return redirect(f'{url}?comments={cursor}#comment_{comment.id}')
+    comments = get_comments_page(request, post)
     return render(request,
                   "blog/detail.html",
                   {'post': post, 'form': form, 'comments': comments})
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -52,6 +53,7 @@ MIDDLEWARE = [
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "blog.middleware.PrimaryPinMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -87,6 +89,54 @@ DATABASES = {
     }
 }
 
+# Реплики для чтения лент и страниц постов. Локально это снимки SQLite,
+# которые обновляет команда refresh_replicas; пути перечисляются
+# через запятую в переменной окружения BLOGICUM_REPLICAS.
+DATABASE_REPLICAS = []
+
+for number, path in enumerate(
+    filter(None, os.getenv("BLOGICUM_REPLICAS", "").split(",")), start=1
+):
+    DATABASES[f"replica{number}"] = {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": path,
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS.append(f"replica{number}")
+
+DATABASE_ROUTERS = ["blog.routers.ReplicaRouter"]
+
+# Сколько секунд после записи пользователь читает из основной базы
+REPLICA_LAG_SECONDS = 30
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+
+# LocMemCache живёт в памяти одного процесса: сбросы страниц и счётчиков
+# из команд run_jobs и activate_scheduled_posts до сервера не доходят.
+# Для запуска с ними кеш выносится в общий каталог из переменной
+# окружения BLOGICUM_CACHE_DIR (или в Redis/Memcached на сервере).
+if os.getenv("BLOGICUM_CACHE_DIR"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": os.getenv("BLOGICUM_CACHE_DIR"),
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+# Сколько секунд может устаревать закешированное число постов в ленте
+FEED_COUNT_CACHE_TIMEOUT = 60
+
+# Сколько секунд хранятся страницы для анонимных читателей
+PAGE_CACHE_TIMEOUT = 300
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -138,6 +188,11 @@ MEDIA_URL = "media/"
 
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Предельный размер файла и число пикселей изображения поста
+IMAGE_UPLOAD_MAX_BYTES = 10 * 1024 * 1024
+
+IMAGE_UPLOAD_MAX_PIXELS = 40_000_000
+
 LOGIN_URL = "login"
 
 LOGOUT_REDIRECT_URL = "blog:index"
@@ -0,0 +1,9 @@
+'use strict';
+// Переход к отфильтрованному списку при выборе в AutocompleteFilter.
+window.addEventListener('load', function () {
+  django.jQuery('.autocomplete-filter select').on('change', function () {
+    var query = this.dataset.queryString;
+    window.location.search = query + (query.length > 1 ? '&' : '')
+      + encodeURIComponent(this.name) + '=' + encodeURIComponent(this.value);
+  });
+});
@@ -41,6 +41,26 @@ def enable_debug_false():
         yield
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    from django.core.cache import cache
+
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def replica(settings):
+    """Реплика-зеркало: псевдоним с тем же соединением, что у основной базы."""
+    from django.db import connections
+
+    settings.DATABASE_REPLICAS = ["replica"]
+    connections["replica"] = connections["default"]
+    yield "replica"
+    del connections["replica"]
+
+
 class SafeImportFromContextManager:
     def __init__(
             self,
@@ -0,0 +1,233 @@
+from datetime import datetime, timezone
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from blog.models import CalendarDay, Comment, Post
+from blog.paginators import estimate_row_count
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _changelist(admin_client, url, **params):
+    response = admin_client.get(url, params)
+    assert response.status_code == 200
+    return response.context["cl"]
+
+
+@pytest.mark.skipif(
+    connection.vendor != "sqlite",
+    reason="Поиск по индексам FTS5 есть только в SQLite.",
+)
+def test_comment_admin_search_uses_indexes(
+        admin_client, mixer, post_with_published_location, user,
+        another_user
+):
+    post = post_with_published_location
+    post.title = "Прогулка по набережной"
+    post.save()
+    by_user = mixer.blend(
+        Comment, post=post, author=user, text="Видели кометы")
+    by_another = mixer.blend(
+        Comment, post=post, author=another_user, text="Обычный день")
+
+    def search(query):
+        cl = _changelist(admin_client, "/admin/blog/comment/", q=query)
+        return sorted(comment.pk for comment in cl.result_list)
+
+    assert search("комет") == [by_user.pk]
+    assert search(user.username) == [by_user.pk], (
+        "Убедитесь, что поиск комментариев находит их по имени автора."
+    )
+    assert search(user.username[:3].swapcase()) == [by_user.pk], (
+        "Убедитесь, что имя автора ищется без учёта регистра,"
+        " как стандартным поиском админки."
+    )
+    assert search("набережной") == sorted([by_user.pk, by_another.pk])
+    assert search(f"набереж {another_user.username}") == [by_another.pk]
+    assert search('"видели кометы"') == [by_user.pk]
+    by_user.text = "Другой текст"
+    by_user.save()
+    assert search("комет") == []
+
+
+def test_post_admin_search_finds_title_substrings(
+        admin_client, post_with_published_location
+):
+    post = post_with_published_location
+    post.title = "Прогулка по набережной"
+    post.save()
+    cl = _changelist(admin_client, "/admin/blog/post/", q="бережн")
+    assert [found.pk for found in cl.result_list] == [post.pk], (
+        "Убедитесь, что посты в админке ищутся по части заголовка."
+    )
+
+
+def test_admin_filters_are_autocomplete(
+        admin_client, mixer, post_with_published_location, another_user,
+        user
+):
+    posts = mixer.cycle(3).blend(
+        "blog.Post", author=user, title=mixer.sequence("Скрытый пост {0}"))
+    comment = mixer.blend(
+        Comment, post=post_with_published_location, author=another_user)
+    mixer.blend(Comment, post=posts[0], author=user)
+
+    response = admin_client.get("/admin/blog/comment/")
+    content = response.content.decode()
+    assert "admin-autocomplete" in content
+    # Пост с комментарием есть в самом списке, остальных быть не должно.
+    assert all(post.title not in content for post in posts[1:]), (
+        "Убедитесь, что фильтры списка комментариев не выводят"
+        " все посты в боковую панель."
+    )
+    cl = _changelist(
+        admin_client, "/admin/blog/comment/",
+        post__id__exact=post_with_published_location.pk)
+    assert [c.pk for c in cl.result_list] == [comment.pk]
+
+    response = admin_client.get("/admin/autocomplete/", {
+        "app_label": "blog", "model_name": "comment",
+        "field_name": "post", "term": "Скрыт",
+    })
+    assert sorted(int(r["id"]) for r in response.json()["results"]) == [
+        post.pk for post in posts
+    ], "Убедитесь, что варианты фильтра подгружает автодополнение."
+
+    response = admin_client.get(
+        f"/admin/blog/post/{post_with_published_location.pk}/change/")
+    assert response.content.decode().count("admin-autocomplete") >= 3
+
+
+def _count_queries(admin_client, url):
+    with CaptureQueriesContext(connection) as context:
+        assert admin_client.get(url).status_code == 200
+    return [query["sql"] for query in context.captured_queries]
+
+
+@pytest.mark.parametrize(
+    ("url", "model"),
+    [("/admin/blog/post/", "blog.Post"),
+     ("/admin/blog/comment/", "blog.Comment")],
+)
+def test_admin_changelist_queries_do_not_grow(
+        admin_client, mixer, user, published_category,
+        published_locations, url, model
+):
+    def blend(count):
+        posts = mixer.cycle(count).blend(
+            "blog.Post", author=user, category=published_category,
+            location=mixer.sequence(*published_locations))
+        if model == "blog.Comment":
+            mixer.cycle(count).blend(
+                model, post=mixer.sequence(*posts), author=user)
+
+    blend(2)
+    _count_queries(admin_client, url)
+    few = _count_queries(admin_client, url)
+    blend(8)
+    many = _count_queries(admin_client, url)
+    assert len(many) == len(few), (
+        "Убедитесь, что список в админке не выполняет отдельные"
+        " запросы для каждой строки."
+    )
+    assert sum("COUNT(" in sql for sql in many) == 0, (
+        "Убедитесь, что число строк списка берётся из кеша"
+        " и полный подсчёт не выполняется."
+    )
+
+
+@pytest.mark.skipif(
+    connection.vendor != "sqlite", reason="Оценка по sqlite_stat1."
+)
+def test_admin_changelist_uses_estimated_count(
+        admin_client, mixer, user, monkeypatch
+):
+    monkeypatch.setattr(
+        "blog.paginators.ADMIN_COUNT_ESTIMATE_THRESHOLD", 5)
+    mixer.cycle(6).blend("blog.Post", author=user)
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE")
+    queries = _count_queries(admin_client, "/admin/blog/post/")
+    assert not any("COUNT(" in sql for sql in queries), (
+        "Убедитесь, что список без фильтров по большой таблице берёт"
+        " число строк из статистики базы, без COUNT(*)."
+    )
+
+
+@pytest.mark.skipif(
+    connection.vendor != "sqlite", reason="Оценка по sqlite_stat1."
+)
+def test_row_estimate_ignores_partial_indexes(mixer, user):
+    mixer.cycle(6).blend("blog.Post", author=user)
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE")
+        # Строка частичного индекса идёт первой и считает не все посты.
+        cursor.execute("DELETE FROM sqlite_stat1 WHERE tbl = 'blog_post'")
+        cursor.executemany(
+            "INSERT INTO sqlite_stat1 VALUES ('blog_post', %s, %s)",
+            [("post_scheduled_pub_date_idx", "2 1"),
+             ("post_author_pub_date_idx", "6 3 1")],
+        )
+    assert estimate_row_count(Post, "default") == 6, (
+        "Убедитесь, что оценка числа строк не берётся из частичного"
+        " индекса."
+    )
+
+
+def test_admin_date_hierarchy_uses_calendar(
+        admin_client, mixer, user, published_category
+):
+    def posts_per_day():
+        return dict(
+            CalendarDay.objects.filter(kind=CalendarDay.POSTS, count__gt=0)
+            .values_list("day", "count")
+        )
+
+    first, second = (
+        mixer.blend(
+            Post, author=user, category=published_category,
+            pub_date=datetime(year, 5, 3, 12, tzinfo=timezone.utc))
+        for year in (2020, 2021)
+    )
+    days = posts_per_day()
+    assert days == {first.pub_date.date(): 1, second.pub_date.date(): 1}, (
+        "Убедитесь, что календарь админки учитывает добавленные посты."
+    )
+    second.pub_date = datetime(2020, 5, 3, 18, tzinfo=timezone.utc)
+    second.save()
+    assert posts_per_day() == {first.pub_date.date(): 2}, (
+        "Убедитесь, что при смене даты публикации пост переносится"
+        " в календаре на новый день."
+    )
+
+    with CaptureQueriesContext(connection) as context:
+        content = admin_client.get("/admin/blog/post/").content.decode()
+    assert "blog_post" not in " ".join(
+        query["sql"] for query in context.captured_queries
+        if "DISTINCT" in query["sql"]
+    ), (
+        "Убедитесь, что навигация по датам списка постов берётся"
+        " из календаря, а не из выборки DISTINCT по таблице постов."
+    )
+    assert "pub_date__month=5" in content
+
+    second.delete()
+    assert posts_per_day() == {first.pub_date.date(): 1}
+
+
+def test_calendar_counts_do_not_go_below_zero(mixer, user, published_category):
+    post = mixer.blend(Post, author=user, category=published_category)
+    Comment.objects.bulk_create(
+        [Comment(post=post, author=user, text="Без сигналов")] * 2)
+    mixer.blend(Comment, post=post, author=user)
+    CalendarDay.objects.filter(kind=CalendarDay.POSTS).delete()
+
+    post.delete()
+    assert not Post.objects.exists()
+    assert set(
+        CalendarDay.objects.values_list("count", flat=True)) <= {0}, (
+        "Убедитесь, что удаление записей, не учтённых в календаре,"
+        " не уводит счётчики дней ниже нуля."
+    )
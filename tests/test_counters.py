@@ -0,0 +1,101 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from blog.archive import rebuild_calendar
+from blog.models import CalendarDay, Comment, FeedEntry, Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _comment_count(post):
+    return Post.objects.values_list("comment_count", flat=True).get(
+        pk=post.pk)
+
+
+def test_comment_count_follows_comments(
+        mixer, post_with_published_location, another_user
+):
+    post = post_with_published_location
+    comments = mixer.cycle(3).blend(Comment, post=post, author=another_user)
+    assert _comment_count(post) == 3, (
+        "Убедитесь, что при добавлении комментария увеличивается"
+        " сохранённый счётчик комментариев поста."
+    )
+    post.title = "Другой заголовок"
+    post.save()
+    assert _comment_count(post) == 3, (
+        "Убедитесь, что сохранение поста не перезаписывает"
+        " счётчик комментариев."
+    )
+    comments[0].delete()
+    assert _comment_count(post) == 2
+    another_user.delete()
+    assert _comment_count(post) == 0, (
+        "Убедитесь, что счётчик уменьшается и при каскадном"
+        " удалении комментариев."
+    )
+
+
+def test_recount_comments_repairs_counter(
+        mixer, post_with_published_location, user
+):
+    post = post_with_published_location
+    mixer.cycle(2).blend(Comment, post=post, author=user)
+    Post.objects.filter(pk=post.pk).update(comment_count=10)
+    FeedEntry.objects.filter(pk=post.pk).update(comment_count=7)
+    call_command("recount_comments", chunk_size=1, stdout=StringIO())
+    assert _comment_count(post) == 2
+    assert FeedEntry.objects.get(pk=post.pk).comment_count == 2, (
+        "Убедитесь, что recount_comments исправляет и счётчики ленты."
+    )
+
+
+
+def _calendar():
+    return sorted(
+        CalendarDay.objects.filter(count__gt=0)
+        .values_list("kind", "day", "count")
+    )
+
+
+def _delete_queries(post):
+    with CaptureQueriesContext(connection) as context:
+        post.delete()
+    return len(context.captured_queries)
+
+
+def test_post_deletion_does_not_query_per_comment(mixer, user, another_user):
+    few, many = mixer.cycle(2).blend(Post, author=user)
+    mixer.blend(Comment, post=few, author=another_user)
+    mixer.cycle(20).blend(Comment, post=many, author=another_user)
+    assert _delete_queries(many) == _delete_queries(few), (
+        "Убедитесь, что удаление поста не выполняет отдельные запросы"
+        " для каждого его комментария."
+    )
+    assert _calendar() == []
+
+
+def test_user_deletion_keeps_counters_consistent(
+        mixer, user, another_user, post_with_published_location
+):
+    foreign_post = post_with_published_location
+    own_post = mixer.blend(Post, author=another_user)
+    mixer.cycle(3).blend(Comment, post=foreign_post, author=another_user)
+    mixer.cycle(2).blend(Comment, post=own_post, author=another_user)
+    mixer.blend(Comment, post=own_post, author=user)
+    mixer.blend(Comment, post=foreign_post, author=user)
+
+    another_user.delete()
+    assert _comment_count(foreign_post) == 1
+    assert FeedEntry.objects.values_list(
+        "comment_count", flat=True).get(pk=foreign_post.pk) == 1
+    calendar = _calendar()
+    rebuild_calendar()
+    assert calendar == _calendar(), (
+        "Убедитесь, что после удаления пользователя календарь совпадает"
+        " с пересчитанным по таблицам."
+    )
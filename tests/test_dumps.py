@@ -0,0 +1,110 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+
+from blog.dumps import get_pk_ranges, iter_dump_records, open_dump
+from blog.feed import check_feed
+from blog.models import Comment, Post
+
+pytestmark = [pytest.mark.django_db]
+
+CREATED_AT = "2022-12-18T23:03:52.159Z"
+
+# Порядок как в dumpdata: посты раньше пользователей.
+RECORDS = [
+    {"model": "blog.category", "pk": 1, "fields": {
+        "created_at": CREATED_AT, "is_published": True, "title": "Категория",
+        "slug": "category", "description": "Описание"}},
+    {"model": "blog.location", "pk": 1, "fields": {
+        "created_at": CREATED_AT, "is_published": True, "name": "Место"}},
+    {"model": "blog.post", "pk": 1, "fields": {
+        "created_at": CREATED_AT, "is_published": True, "title": "Пост",
+        "text": "<b>Текст</b>", "pub_date": CREATED_AT, "author": 1,
+        "location": 1, "category": 1, "image": ""}},
+    {"model": "blog.post", "pk": 2, "fields": {
+        "created_at": CREATED_AT, "is_published": False, "title": "Скрытый",
+        "text": "Текст", "pub_date": CREATED_AT, "author": 1,
+        "location": None, "category": 1, "image": ""}},
+    {"model": "blog.comment", "pk": 1, "fields": {
+        "post": 1, "author": 1, "text": "Комментарий",
+        "created_at": CREATED_AT}},
+    {"model": "sessions.session", "pk": "key", "fields": {
+        "session_data": "", "expire_date": CREATED_AT}},
+    {"model": "auth.user", "pk": 1, "fields": {
+        "password": "!", "username": "author", "groups": [],
+        "user_permissions": [], "date_joined": CREATED_AT}},
+]
+
+
+@pytest.mark.parametrize("suffix", [".json", ".jsonl"])
+def test_load_dump(tmp_path, suffix):
+    path = tmp_path / f"dump{suffix}"
+    if suffix == ".json":
+        path.write_text(json.dumps(RECORDS, indent=2), encoding="utf-8")
+    else:
+        path.write_text(
+            "\n".join(json.dumps(record) for record in RECORDS),
+            encoding="utf-8",
+        )
+    out = StringIO()
+    call_command("load_dump", str(path), batch_size=1, stdout=out)
+    assert "пропущено: 1" in out.getvalue()
+
+    post = Post.objects.get(pk=1)
+    assert post.created_at.year == 2022, (
+        "Убедитесь, что загрузчик сохраняет даты создания из дампа."
+    )
+    assert post.is_visible and post.comment_count == 1
+    assert post.text_html == "&lt;b&gt;Текст&lt;/b&gt;"
+    assert not Post.objects.get(pk=2).is_visible
+    assert Comment.objects.get(pk=1).text_html == "Комментарий"
+    assert not any(check_feed().values()), (
+        "Убедитесь, что после загрузки дампа лента пересобирается."
+    )
+
+
+def test_load_dump_twice_is_command_error(tmp_path):
+    path = tmp_path / "dump.json"
+    path.write_text(json.dumps(RECORDS), encoding="utf-8")
+    call_command("load_dump", str(path), stdout=StringIO())
+    with pytest.raises(CommandError, match="конфликтуют"):
+        call_command("load_dump", str(path), stdout=StringIO())
+    assert Post.objects.count() == 2
+
+
+@pytest.mark.parametrize("suffix", [".jsonl", ".jsonl.gz"])
+def test_export_dump(tmp_path, suffix, mixer, post_with_published_location,
+                     another_user):
+    post = post_with_published_location
+    mixer.cycle(3).blend(Comment, post=post, author=another_user)
+    path = tmp_path / f"export{suffix}"
+    call_command(
+        "export_dump", str(path), chunk_size=2, stdout=StringIO())
+    with open_dump(path) as stream:
+        records = list(iter_dump_records(stream, jsonl=True))
+    assert [(r["model"], r["pk"]) for r in records] == [
+        ("blog.post", post.pk)
+    ] + [
+        ("blog.comment", comment.pk)
+        for comment in Comment.objects.order_by("pk")
+    ], (
+        "Убедитесь, что выгрузка содержит все посты и комментарии."
+    )
+
+    call_command(
+        "export_dump", str(path), since="2999-01-01", stdout=StringIO())
+    with open_dump(path) as stream:
+        assert not list(iter_dump_records(stream, jsonl=True))
+
+
+def test_pk_ranges_cover_queryset(mixer, user):
+    posts = mixer.cycle(7).blend(Post, author=user)
+    ranges = get_pk_ranges(Post.objects.all(), 3)
+    assert len(ranges) == 3
+    assert ranges[0][0] == posts[0].pk and ranges[-1][1] == posts[-1].pk
+    assert all(
+        previous[1] + 1 == current[0]
+        for previous, current in zip(ranges, ranges[1:])
+    )
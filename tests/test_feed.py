@@ -0,0 +1,134 @@
+from io import StringIO
+from unittest import mock
+
+import pytest
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+
+from blog.feed import (activate_scheduled_posts, check_feed,
+                       get_next_activation)
+from blog.models import Comment, FeedEntry, Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _assert_feed_consistent():
+    report = check_feed()
+    assert not any(report.values()), (
+        "Убедитесь, что материализованная лента обновляется вместе с"
+        f" постами, категориями, местами и авторами: {report}"
+    )
+
+
+def test_feed_follows_related_changes(
+        mixer, many_posts_with_published_locations, published_category,
+        published_locations, user
+):
+    _assert_feed_consistent()
+    assert FeedEntry.objects.count() == len(
+        many_posts_with_published_locations)
+
+    published_category.title = "Новое название"
+    published_category.save()
+    published_locations[0].is_published = False
+    published_locations[0].save()
+    user.username = "renamed_author"
+    user.save()
+    mixer.blend(
+        Comment, post=many_posts_with_published_locations[0], author=user)
+    _assert_feed_consistent()
+
+    published_category.is_published = False
+    published_category.save()
+    assert not FeedEntry.objects.exists()
+    published_category.is_published = True
+    published_category.save()
+    _assert_feed_consistent()
+
+
+def test_rebuild_feed_command(many_posts_with_published_locations):
+    FeedEntry.objects.all().delete()
+    with pytest.raises(CommandError):
+        call_command("rebuild_feed", check=True, stdout=StringIO())
+    call_command("rebuild_feed", stdout=StringIO())
+    _assert_feed_consistent()
+
+
+def test_scheduled_posts_are_activated(future_posts):
+    assert not FeedEntry.objects.exists()
+    first = min(future_posts, key=lambda post: post.pub_date)
+    assert get_next_activation() == first.pub_date, (
+        "Убедитесь, что момент ближайшей отложенной публикации"
+        " совпадает с датой ближайшего отложенного поста."
+    )
+
+    activated = activate_scheduled_posts(now=first.pub_date)
+    assert activated == [first.pk]
+    assert Post.objects.get(pk=first.pk).is_visible
+    assert FeedEntry.objects.filter(pk=first.pk).exists(), (
+        "Убедитесь, что включённый отложенный пост попадает в ленту."
+    )
+    assert get_next_activation() > first.pub_date
+
+
+def test_activation_changes_feed_etag(client, future_posts):
+    first = min(future_posts, key=lambda post: post.pub_date)
+    etag = client.get("/")["ETag"]
+    activate_scheduled_posts(now=first.pub_date)
+    response = client.get("/", HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200, (
+        "Убедитесь, что после включения отложенных постов лента"
+        " получает новую версию."
+    )
+    assert first.title in response.content.decode()
+
+
+def test_excerpt_is_stored_and_repaired(post_with_published_location):
+    post = post_with_published_location
+    post.text = " ".join(f"слово{i}" for i in range(20))
+    post.save()
+    expected = " ".join(f"слово{i}" for i in range(10)) + " …"
+    assert Post.objects.get(pk=post.pk).excerpt == expected, (
+        "Убедитесь, что при сохранении поста сохраняется начало текста."
+    )
+    assert FeedEntry.objects.get(pk=post.pk).excerpt == expected
+
+    Post.objects.filter(pk=post.pk).update(excerpt="")
+    FeedEntry.objects.filter(pk=post.pk).update(excerpt="")
+    call_command("fill_excerpts", chunk_size=1, stdout=StringIO())
+    assert Post.objects.get(pk=post.pk).excerpt == expected
+    assert FeedEntry.objects.get(pk=post.pk).excerpt == expected
+
+
+def test_post_cards_are_cached_per_version(
+        client, settings, mixer, many_posts_with_published_locations,
+        published_category, user
+):
+    # Проверяется кеш карточек, а не кеш страниц целиком.
+    settings.PAGE_CACHE_TIMEOUT = 0
+    client.get("/")
+    with mock.patch("blog.caching.render_to_string") as render:
+        with mock.patch.object(
+                cache, "get_many", wraps=cache.get_many) as get_many:
+            content = client.get("/").content.decode()
+    assert not render.called, (
+        "Убедитесь, что карточки постов берутся из кеша фрагментов."
+    )
+    assert get_many.call_count == 1, (
+        "Убедитесь, что карточки страницы читаются из кеша одним запросом."
+    )
+    assert published_category.title in content
+
+    published_category.title = "Новое название"
+    published_category.save()
+    user.username = "renamed_author"
+    user.save()
+    newest = max(
+        many_posts_with_published_locations, key=lambda post: post.pub_date)
+    mixer.blend(Comment, post=newest, author=user)
+    content = client.get("/").content.decode()
+    assert "Новое название" in content and "@renamed_author" in content, (
+        "Убедитесь, что карточка перерисовывается после изменения"
+        " категории и автора поста."
+    )
+    assert "Комментарии (1)" in content
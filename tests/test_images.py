@@ -0,0 +1,126 @@
+from importlib import import_module
+from io import BytesIO, StringIO
+
+import pytest
+from django.apps import apps
+from django.core.files.images import ImageFile
+from django.core.management import call_command
+from PIL import Image
+
+from blog.constants import IMAGE_VARIANT_WIDTHS
+from blog.jobs import IMAGE_VARIANTS_JOB, get_job_metrics
+from blog.models import FeedEntry, Job, Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _image_file(width, height, name="wide.jpg"):
+    buffer = BytesIO()
+    Image.new("RGB", (width, height), color=(73, 109, 137)).save(
+        buffer, format="JPEG")
+    return ImageFile(buffer, name=name)
+
+
+@pytest.fixture
+def wide_post(mixer, user, published_category):
+    return mixer.blend(
+        Post, author=user, category=published_category, location=None,
+        is_published=True, image=_image_file(3000, 1500))
+
+
+def _run_jobs():
+    call_command("run_jobs", "--once", stdout=StringIO())
+
+
+def test_image_variants_are_made_in_background(client, wide_post):
+    assert wide_post.image_variants == {}
+    assert "image_placeholder.svg" in client.get("/").content.decode(), (
+        "Убедитесь, что до построения копий изображения вместо него"
+        " выводится заглушка."
+    )
+    job = Job.objects.get()
+    assert (job.kind, job.payload) == (
+        IMAGE_VARIANTS_JOB, {"post_id": wide_post.pk})
+
+    _run_jobs()
+    job.refresh_from_db()
+    assert job.status == Job.DONE
+    wide_post.refresh_from_db()
+    variants = wide_post.image_variants
+    assert {
+        variant: data["width"] for variant, data in variants.items()
+    } == IMAGE_VARIANT_WIDTHS, (
+        "Убедитесь, что при сохранении изображения поста создаются"
+        " уменьшенные копии."
+    )
+    storage = wide_post.image.storage
+    with storage.open(variants["card"]["name"]) as stored:
+        assert Image.open(stored).size == (640, 320)
+    assert FeedEntry.objects.get(pk=wide_post.pk).image_variants == variants
+
+    content = client.get("/").content.decode()
+    assert f'src="{wide_post.card_image_url}"' in content
+    assert wide_post.card_srcset in content and "640w" in content, (
+        "Убедитесь, что карточка поста выводит копии через srcset."
+    )
+
+
+def test_small_images_are_not_upscaled(mixer, user, published_category):
+    post = mixer.blend(
+        Post, author=user, category=published_category,
+        image=_image_file(100, 100, "small.jpg"))
+    _run_jobs()
+    post.refresh_from_db()
+    assert {data["name"] for data in post.image_variants.values()} == {
+        post.image.name}
+    assert post.card_srcset == f"{post.image.url} 100w"
+
+
+def test_backfill_command_fills_missing_variants(wide_post):
+    out = StringIO()
+    call_command("make_image_variants", stdout=out)
+    assert "Обработано постов: 1" in out.getvalue()
+    wide_post.refresh_from_db()
+    assert set(wide_post.image_variants) == set(IMAGE_VARIANT_WIDTHS)
+    assert FeedEntry.objects.get(pk=wide_post.pk).image_variants == (
+        wide_post.image_variants)
+
+
+def test_failed_jobs_are_retried_and_counted(wide_post):
+    wide_post.image.storage.delete(wide_post.image.name)
+    for _ in range(3):
+        _run_jobs()
+    job = Job.objects.get()
+    assert (job.status, job.attempts) == (Job.FAILED, 3), (
+        "Убедитесь, что упавшая задача перезапускается ограниченное"
+        " число раз."
+    )
+    metrics = get_job_metrics()
+    assert (metrics["failed"], metrics["queued"], metrics["done"]) == (
+        1, 0, 0)
+
+
+def test_failed_variants_show_original(client, wide_post):
+    url = f"/posts/{wide_post.pk}/"
+    assert "image_placeholder.svg" in client.get(url).content.decode()
+    wide_post.image.storage.delete(wide_post.image.name)
+    for _ in range(3):
+        _run_jobs()
+    for content in (client.get(url).content, client.get("/").content):
+        assert "image_placeholder.svg" not in content.decode(), (
+            "Убедитесь, что после окончательного падения задачи вместо"
+            " заглушки выводится оригинал изображения."
+        )
+        assert f'src="{wide_post.image.url}"' in content.decode()
+
+
+def test_migration_queues_posts_without_variants(wide_post):
+    migration = import_module("blog.migrations.0020_queue_image_variants")
+    Job.objects.all().delete()
+    migration.queue_missing_image_variants(apps, None)
+    migration.queue_missing_image_variants(apps, None)
+    job = Job.objects.get()
+    assert (job.kind, job.payload, job.status) == (
+        IMAGE_VARIANTS_JOB, {"post_id": wide_post.pk}, Job.QUEUED), (
+        "Убедитесь, что посты без копий получают задачу их построения."
+    )
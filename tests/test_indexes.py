@@ -0,0 +1,95 @@
+import pytest
+from django.db import connection
+
+from blog.models import Comment
+from blog.paginators import CursorPaginator
+from blog.utils import get_base_post, get_feed, optimize_post_queryset
+
+pytestmark = [
+    pytest.mark.django_db,
+    pytest.mark.skipif(
+        connection.vendor != "sqlite",
+        reason="Проверяется план запроса SQLite (EXPLAIN QUERY PLAN).",
+    ),
+]
+
+FEED_ORDERING = ("-pub_date", "-pk")
+
+
+def _plan(queryset):
+    return queryset.explain()
+
+
+@pytest.mark.parametrize(
+    ("get_queryset", "index_name"),
+    [
+        (
+            lambda post: get_base_post(),
+            "post_visible_pub_date_idx",
+        ),
+        (
+            lambda post: get_base_post().filter(category=post.category),
+            "post_category_pub_date_idx",
+        ),
+        (
+            lambda post: get_base_post().filter(author=post.author),
+            "post_author_pub_date_idx",
+        ),
+    ],
+    ids=["index", "category_posts", "profile"],
+)
+def test_feed_queries_use_index(
+        post_with_published_location, get_queryset, index_name
+):
+    queryset = optimize_post_queryset(
+        get_queryset(post_with_published_location)
+    ).order_by(*FEED_ORDERING)[:10]
+    plan = _plan(queryset)
+    assert index_name in plan, (
+        f"Убедитесь, что запрос ленты использует индекс `{index_name}`."
+        f" План запроса:\n{plan}"
+    )
+    assert "TEMP B-TREE" not in plan, (
+        "Убедитесь, что сортировка ленты выполняется по индексу,"
+        f" без временной сортировки. План запроса:\n{plan}"
+    )
+
+
+@pytest.mark.parametrize(
+    ("get_queryset", "index_name"),
+    [
+        (lambda post: get_feed(), "feed_entry_pub_date_idx"),
+        (
+            lambda post: get_feed().filter(category=post.category),
+            "feed_entry_category_idx",
+        ),
+    ],
+    ids=["index", "category_posts"],
+)
+@pytest.mark.parametrize("after_cursor", [False, True], ids=["first", "next"])
+def test_feed_entry_queries_use_index(
+        post_with_published_location, get_queryset, index_name, after_cursor
+):
+    post = post_with_published_location
+    paginator = CursorPaginator(get_queryset(post), 10)
+    queryset = paginator.queryset.order_by(*paginator.ordering())
+    if after_cursor:
+        queryset = queryset.filter(paginator._beyond((post.pub_date, post.pk)))
+    plan = _plan(queryset[:11])
+    assert index_name in plan, (
+        f"Убедитесь, что запрос ленты использует индекс `{index_name}`."
+        f" План запроса:\n{plan}"
+    )
+    assert "TEMP B-TREE" not in plan, (
+        "Убедитесь, что страница ленты по курсору сортируется по индексу,"
+        f" без временной сортировки. План запроса:\n{plan}"
+    )
+
+
+def test_post_comments_query_uses_index(post_with_published_location):
+    queryset = Comment.objects.filter(
+        post=post_with_published_location
+    ).order_by("created_at")
+    plan = _plan(queryset)
+    assert "comment_post_created_at_idx" in plan, plan
+    assert "TEMP B-TREE" not in plan, plan
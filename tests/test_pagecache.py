@@ -0,0 +1,164 @@
+from io import StringIO
+
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+
+from blog.models import Comment
+from blog.pagecache import PAGE_CACHE_HEADER, get_page_cache_stats
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _cache_status(client, url):
+    response = client.get(url)
+    assert response.status_code == 200
+    return response[PAGE_CACHE_HEADER]
+
+
+def test_anonymous_pages_are_cached_and_purged_by_tags(
+        client, mixer, post_with_published_location, published_category,
+        another_user
+):
+    post = post_with_published_location
+    detail = f"/posts/{post.id}/"
+    category = f"/category/{published_category.slug}/"
+    for url in ("/", detail, category):
+        assert _cache_status(client, url) == "MISS"
+        assert _cache_status(client, url) == "HIT", (
+            f"Убедитесь, что страница `{url}` для анонимных посетителей"
+            " отдаётся из кеша."
+        )
+
+    mixer.blend(Comment, post=post, author=another_user, text="Новый")
+    assert _cache_status(client, detail) == "MISS", (
+        "Убедитесь, что новый комментарий сбрасывает кеш страницы поста."
+    )
+    assert "Новый" in client.get(detail).content.decode()
+    assert _cache_status(client, "/") == "MISS", (
+        "Убедитесь, что страницы с карточкой поста сбрасываются при"
+        " изменении числа комментариев."
+    )
+
+    published_category.description = "Новое описание"
+    published_category.save()
+    assert _cache_status(client, category) == "MISS"
+    assert _cache_status(client, detail) == "MISS"
+
+    another_user.first_name = "Иван"
+    another_user.save()
+    assert _cache_status(client, category) == "HIT", (
+        "Убедитесь, что сбрасываются только страницы, на которых"
+        " выводятся изменённые данные."
+    )
+    assert _cache_status(client, detail) == "MISS"
+
+
+def test_logged_in_users_bypass_page_cache(
+        user_client, post_with_published_location
+):
+    response = user_client.get("/")
+    assert PAGE_CACHE_HEADER not in response
+    assert get_page_cache_stats() == {"hits": 0, "misses": 0}
+
+
+def test_page_cache_stats_command(client, post_with_published_location):
+    for _ in range(3):
+        client.get("/")
+    out = StringIO()
+    call_command("page_cache_stats", "--reset", stdout=out)
+    assert "Попаданий: 2, промахов: 1" in out.getvalue()
+    assert get_page_cache_stats() == {"hits": 0, "misses": 0}
+
+
+def test_unchanged_feed_page_returns_not_modified(
+        client, django_assert_num_queries, post_with_published_location
+):
+    etag = client.get("/")["ETag"]
+    with django_assert_num_queries(0):
+        response = client.get("/", HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304, (
+        "Убедитесь, что неизменившаяся лента отвечает 304 без запросов"
+        " к базе."
+    )
+
+
+def test_feed_validators_work_without_page_cache(
+        client, user_client, settings, django_assert_max_num_queries, mixer,
+        post_with_published_location, published_category, another_user
+):
+    settings.PAGE_CACHE_TIMEOUT = 0
+    category = f"/category/{published_category.slug}/"
+    for reader in (client, user_client):
+        for url in ("/", category):
+            etag = reader.get(url)["ETag"]
+            # Вошедшему пользователю нужны только сессия и пользователь.
+            with django_assert_max_num_queries(2):
+                response = reader.get(url, HTTP_IF_NONE_MATCH=etag)
+            assert response.status_code == 304, (
+                f"Убедитесь, что страница `{url}` отвечает 304 и без кеша"
+                " страниц, в том числе вошедшему пользователю."
+            )
+
+    etag = user_client.get("/")["ETag"]
+    assert client.get("/")["ETag"] != etag
+    mixer.blend(
+        Comment, post=post_with_published_location, author=another_user)
+    response = user_client.get("/", HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert "Комментарии (1)" in response.content.decode()
+
+
+def test_post_detail_etag_follows_updates(
+        client, django_assert_num_queries, mixer,
+        post_with_published_location, another_user
+):
+    url = f"/posts/{post_with_published_location.id}/"
+    etag = client.get(url)["ETag"]
+    # Без страницы в кеше версия проверяется одним запросом к базе.
+    cache.clear()
+    with django_assert_num_queries(1):
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+
+    mixer.blend(
+        Comment, post=post_with_published_location, author=another_user)
+    cache.clear()
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200, (
+        "Убедитесь, что после нового комментария страница поста"
+        " получает новую версию."
+    )
+    assert response["ETag"] != etag
+
+
+def test_replica_pages_are_not_cached_right_after_purge(
+        client, settings, replica, mixer, post_with_published_location,
+        another_user
+):
+    post = post_with_published_location
+    detail = f"/posts/{post.id}/"
+    mixer.blend(Comment, post=post, author=another_user)
+    assert _cache_status(client, detail) == "MISS"
+    assert _cache_status(client, detail) == "MISS", (
+        "Убедитесь, что страница, прочитанная с реплики в пределах"
+        " REPLICA_LAG_SECONDS после сброса, не сохраняется в кеш."
+    )
+    settings.REPLICA_LAG_SECONDS = 0
+    assert _cache_status(client, detail) == "MISS"
+    assert _cache_status(client, detail) == "HIT"
+
+
+def test_evicted_purge_marks_make_pages_stale(
+        client, post_with_published_location
+):
+    detail = f"/posts/{post_with_published_location.id}/"
+    assert _cache_status(client, detail) == "MISS"
+    assert _cache_status(client, detail) == "HIT"
+    # Кеш вытеснил отметку сброса вместе со сведениями о сбросе.
+    cache.delete(f"page_purge:post:{post_with_published_location.id}")
+    assert _cache_status(client, detail) == "MISS", (
+        "Убедитесь, что страница, отметка сброса метки которой пропала"
+        " из кеша, не отдаётся из кеша."
+    )
+    assert _cache_status(client, detail) == "HIT"
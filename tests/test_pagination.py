@@ -0,0 +1,177 @@
+from http import HTTPStatus
+from unittest import mock
+
+import pytest
+
+from blog.constants import COMMENTS_PER_PAGE
+from blog.models import Comment, FeedEntry
+from blog.utils import get_comment_paginator
+from conftest import N_PER_PAGE
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _get_page(client, url):
+    response = client.get(url)
+    assert response.status_code == HTTPStatus.OK, (
+        f"Убедитесь, что страница `{url}` загружается без ошибок."
+    )
+    return response.context["page_obj"]
+
+
+@pytest.mark.parametrize("url", ["/", "/category/{slug}/"])
+def test_cursor_pagination_walks_feed(
+        client, many_posts_with_published_locations, published_category, url
+):
+    url = url.format(slug=published_category.slug)
+    numbered = _get_page(client, url)
+    assert numbered.next_cursor, (
+        "Убедитесь, что нумерованная страница ленты передаёт курсор"
+        " для перехода на следующую страницу."
+    )
+    seen = [post.id for post in numbered]
+    cursor = numbered.next_cursor
+    while cursor:
+        page = _get_page(client, f"{url}?cursor={cursor}")
+        assert page.is_cursor
+        assert len(page) <= N_PER_PAGE
+        seen.extend(post.id for post in page)
+        cursor = page.next_cursor
+    expected = sorted(
+        many_posts_with_published_locations,
+        key=lambda post: (post.pub_date, post.id),
+        reverse=True,
+    )
+    assert seen == [post.id for post in expected], (
+        "Убедитесь, что при переходе по курсорам лента выводится целиком,"
+        " без пропусков и повторов, в порядке убывания даты публикации."
+    )
+
+
+def test_cursor_pagination_previous_page(
+        client, many_posts_with_published_locations
+):
+    first = _get_page(client, "/")
+    second = _get_page(client, f"/?cursor={first.next_cursor}")
+    assert second.has_previous()
+    back = _get_page(client, f"/?cursor={second.previous_cursor}")
+    assert [post.id for post in back] == [post.id for post in first], (
+        "Убедитесь, что курсор на предыдущую страницу возвращает"
+        " ту же страницу, с которой был выполнен переход."
+    )
+
+
+def test_invalid_cursor_returns_first_page(
+        client, many_posts_with_published_locations
+):
+    first = _get_page(client, "/")
+    page = _get_page(client, "/?cursor=not-a-cursor")
+    assert [post.id for post in page] == [post.id for post in first]
+
+
+def test_feed_count_is_cached_and_invalidated(
+        client, settings, many_posts_with_published_locations
+):
+    # Проверяется кеш числа постов, а не кеш страниц целиком.
+    settings.PAGE_CACHE_TIMEOUT = 0
+    posts = many_posts_with_published_locations
+    assert _get_page(client, "/").paginator.count == len(posts)
+
+    # Прямое удаление записи ленты обходит сигналы: число берётся из кеша.
+    FeedEntry.objects.filter(pk=posts[0].pk).delete()
+    assert _get_page(client, "/").paginator.count == len(posts), (
+        "Убедитесь, что общее число постов ленты берётся из кеша."
+    )
+
+    posts[1].is_published = False
+    posts[1].save()
+    assert _get_page(client, "/").paginator.count == len(posts) - 2, (
+        "Убедитесь, что закешированное число постов сбрасывается"
+        " при снятии поста с публикации."
+    )
+
+
+@pytest.fixture
+def many_comments(mixer, post_with_published_location, another_user):
+    return mixer.cycle(COMMENTS_PER_PAGE + 5).blend(
+        Comment, post=post_with_published_location, author=another_user)
+
+
+def test_comments_are_paginated(
+        client, post_with_published_location, many_comments
+):
+    url = f"/posts/{post_with_published_location.id}/"
+    response = client.get(url)
+    comments = response.context["comments"]
+    assert len(comments) == COMMENTS_PER_PAGE, (
+        "Убедитесь, что на странице поста выводится не больше"
+        f" {COMMENTS_PER_PAGE} комментариев."
+    )
+    fragment = client.get(
+        f"{url}comments/?comments={comments.next_cursor}")
+    assert fragment.status_code == HTTPStatus.OK
+    rest = fragment.context["comments"]
+    assert [c.id for c in comments] + [c.id for c in rest] == [
+        c.id for c in many_comments
+    ], (
+        "Убедитесь, что «Показать ещё» загружает следующие комментарии"
+        " в порядке их добавления."
+    )
+
+
+def test_add_comment_redirects_to_its_page(
+        user_client, post_with_published_location, many_comments
+):
+    url = f"/posts/{post_with_published_location.id}/"
+    response = user_client.post(f"{url}comment/", {"text": "Новый"})
+    comment = Comment.objects.latest("pk")
+    assert response.url.endswith(f"#comment_{comment.id}")
+    page = user_client.get(response.url).context["comments"]
+    assert page[len(page) - 1].id == comment.id, (
+        "Убедитесь, что после добавления комментария открывается"
+        " страница комментариев, на которой он находится."
+    )
+    assert not page.has_next(), (
+        "Убедитесь, что у страницы с последним комментарием нет ссылки"
+        " «Показать ещё»."
+    )
+
+    paginator = get_comment_paginator(post_with_published_location)
+    page = paginator.get_page(paginator.cursor_ending_at(many_comments[0]))
+    assert [c.id for c in page] == [many_comments[0].id]
+    assert page.has_next()
+
+
+def test_page_range_is_elided_and_deep_pages_use_cursor(
+        client, many_posts_with_published_locations
+):
+    expected = sorted(
+        many_posts_with_published_locations,
+        key=lambda post: (post.pub_date, post.id),
+        reverse=True,
+    )
+    with mock.patch("blog.views.POSTS_ON_MAIN", 2), \
+            mock.patch("blog.utils.MAX_OFFSET_PAGE", 6):
+        page = _get_page(client, "/")
+        assert page.page_range == [1, 2, 3, page.paginator.ELLIPSIS, 6], (
+            "Убедитесь, что пагинатор выводит только соседние и крайние"
+            " номера страниц."
+        )
+        assert page.last_query == "cursor=last"
+
+        response = client.get("/?page=10")
+        assert response.status_code == HTTPStatus.FOUND, (
+            "Убедитесь, что страницы дальше допустимого OFFSET"
+            " открываются перенаправлением на курсор."
+        )
+        last = _get_page(client, f"/{response.url}")
+        assert [post.id for post in last] == [
+            post.id for post in expected[-2:]
+        ]
+        assert not last.has_next()
+
+        response = client.get("/?page=7")
+        deep = _get_page(client, f"/{response.url}")
+        assert [post.id for post in deep] == [
+            post.id for post in expected[12:14]
+        ]
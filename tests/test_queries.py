@@ -0,0 +1,61 @@
+from http import HTTPStatus
+
+import pytest
+
+from blog.models import Comment
+
+pytestmark = [pytest.mark.django_db]
+
+# Сессия и пользователь для аутентифицированного клиента
+AUTH_QUERIES = 2
+# Пост (с проверкой видимости и авторства) и комментарии
+POST_DETAIL_QUERIES = 2
+
+
+@pytest.fixture
+def commented_post(mixer, post_with_published_location, another_user):
+    mixer.cycle(5).blend(
+        Comment, post=post_with_published_location, author=another_user)
+    return post_with_published_location
+
+
+@pytest.mark.parametrize(
+    ("client_name", "expected_queries"),
+    [
+        ("unlogged_client", POST_DETAIL_QUERIES),
+        ("user_client", AUTH_QUERIES + POST_DETAIL_QUERIES),
+        ("another_user_client", AUTH_QUERIES + POST_DETAIL_QUERIES),
+    ],
+    ids=["anonymous", "owner", "non-owner"],
+)
+def test_post_detail_query_budget(
+        request, django_assert_num_queries, commented_post, client_name,
+        expected_queries
+):
+    client = request.getfixturevalue(client_name)
+    url = f"/posts/{commented_post.id}/"
+    with django_assert_num_queries(expected_queries):
+        response = client.get(url)
+    assert response.status_code == HTTPStatus.OK
+
+
+@pytest.mark.parametrize(
+    ("client_name", "expected_queries", "expected_status"),
+    [
+        ("unlogged_client", 1, HTTPStatus.NOT_FOUND),
+        ("user_client", AUTH_QUERIES + POST_DETAIL_QUERIES, HTTPStatus.OK),
+        ("another_user_client", AUTH_QUERIES + 1, HTTPStatus.NOT_FOUND),
+    ],
+    ids=["anonymous", "owner", "non-owner"],
+)
+def test_hidden_post_detail_query_budget(
+        request, django_assert_num_queries, commented_post, client_name,
+        expected_queries, expected_status
+):
+    commented_post.is_published = False
+    commented_post.save()
+    client = request.getfixturevalue(client_name)
+    url = f"/posts/{commented_post.id}/"
+    with django_assert_num_queries(expected_queries):
+        response = client.get(url)
+    assert response.status_code == expected_status
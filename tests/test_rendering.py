@@ -0,0 +1,48 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from blog.models import Comment, Post
+from blog.rendering import RENDERER_VERSION
+
+pytestmark = [pytest.mark.django_db]
+
+TEXT = "<b>Жирный</b>\nвторая строка"
+HTML = "&lt;b&gt;Жирный&lt;/b&gt;<br>вторая строка"
+
+
+def test_text_html_is_stored_on_save(
+        mixer, post_with_published_location, another_user
+):
+    post = post_with_published_location
+    post.text = TEXT
+    post.save()
+    comment = mixer.blend(
+        Comment, post=post, author=another_user, text=TEXT)
+    for model, pk in ((Post, post.pk), (Comment, comment.pk)):
+        stored = model.objects.values("text_html", "text_html_version").get(
+            pk=pk)
+        assert stored == {
+            "text_html": HTML, "text_html_version": RENDERER_VERSION
+        }, (
+            "Убедитесь, что при сохранении текста сохраняется"
+            " его экранированный HTML."
+        )
+
+
+def test_rerender_texts_refreshes_stale_rows(
+        client, post_with_published_location
+):
+    post = post_with_published_location
+    post.text = TEXT
+    post.save()
+    Post.objects.filter(pk=post.pk).update(
+        text_html="устарело", text_html_version=0)
+    response = client.get(f"/posts/{post.pk}/")
+    assert HTML in response.content.decode(), (
+        "Убедитесь, что HTML, отрисованный прежней версией правил,"
+        " не выводится на странице поста."
+    )
+    call_command("rerender_texts", chunk_size=1, stdout=StringIO())
+    assert Post.objects.get(pk=post.pk).text_html == HTML
@@ -0,0 +1,72 @@
+import pytest
+from django.db import router
+
+from blog.models import Comment, Post
+from blog.routers import PRIMARY_PIN_COOKIE
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _detail_post(client, post):
+    response = client.get(f"/posts/{post.id}/")
+    assert response.status_code == 200
+    return response.context["post"]
+
+
+def test_views_read_from_replica(
+        client, replica, post_with_published_location
+):
+    post = _detail_post(client, post_with_published_location)
+    assert post._state.db == replica, (
+        "Убедитесь, что страницы для чтения берут данные с реплики."
+    )
+    assert Post.objects.get(pk=post.pk)._state.db == "default", (
+        "Убедитесь, что чтения вне read_from_replica идут в основную базу."
+    )
+    assert router.db_for_write(Post, instance=post) == "default"
+    post.title = "Сохранён в основную базу"
+    post.save()
+    assert post._state.db == "default"
+    assert Post.objects.get(pk=post.pk).title == "Сохранён в основную базу"
+
+
+def test_views_read_from_default_without_replicas(
+        client, post_with_published_location
+):
+    assert _detail_post(client, post_with_published_location)._state.db == (
+        "default"
+    )
+
+
+def test_writers_are_pinned_to_default(
+        user_client, settings, replica, post_with_published_location
+):
+    post = post_with_published_location
+    response = user_client.post(
+        f"/posts/{post.id}/comment/", {"text": "Свой комментарий"})
+    cookie = response.cookies.get(PRIMARY_PIN_COOKIE)
+    assert cookie is not None and cookie["max-age"] == (
+        settings.REPLICA_LAG_SECONDS
+    ), (
+        "Убедитесь, что после успешного POST пользователь получает cookie,"
+        " закрепляющую его за основной базой."
+    )
+    assert Comment.objects.filter(post=post).exists()
+    assert _detail_post(user_client, post)._state.db == "default", (
+        "Убедитесь, что закреплённый пользователь читает из основной базы."
+    )
+
+
+def test_failed_posts_do_not_pin(user_client, replica):
+    response = user_client.post("/posts/0/comment/", {"text": "Текст"})
+    assert response.status_code == 404
+    assert PRIMARY_PIN_COOKIE not in response.cookies
+
+
+def test_users_are_read_from_default(client, replica, user):
+    response = client.get(f"/profile/{user.username}/")
+    assert response.status_code == 200
+    assert response.context["profile"]._state.db == "default", (
+        "Убедитесь, что пользователи читаются из основной базы,"
+        " а не с реплики."
+    )
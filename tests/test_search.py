@@ -0,0 +1,50 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.utils import timezone
+
+pytestmark = [
+    pytest.mark.django_db,
+    pytest.mark.skipif(
+        connection.vendor != "sqlite",
+        reason="Полнотекстовый индекс FTS5 есть только в SQLite.",
+    ),
+]
+
+
+def _search(client, query):
+    response = client.get("/search/", {"q": query})
+    assert response.status_code == HTTPStatus.OK
+    return [post.id for post in response.context["page_obj"]]
+
+
+def test_search_ranks_and_follows_changes(
+        client, mixer, user, published_category
+):
+    in_text, in_title, hidden = mixer.cycle(3).blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=True, title="Заметка", text="Обычный день",
+        pub_date=timezone.now() - timezone.timedelta(days=1),
+    )
+    in_text.text = "Вечером видели комету над городом"
+    in_text.save()
+    in_title.title = "Кометы"
+    in_title.save()
+    hidden.text = "Комета"
+    hidden.is_published = False
+    hidden.save()
+
+    assert _search(client, "комет") == [in_title.id, in_text.id], (
+        "Убедитесь, что поиск находит видимые посты по началу слова"
+        " и ставит совпадения в заголовке выше совпадений в тексте."
+    )
+
+    in_title.title = "Другое"
+    in_title.save()
+    in_text.delete()
+    assert _search(client, "комет") == [], (
+        "Убедитесь, что поисковый индекс обновляется при изменении"
+        " и удалении постов."
+    )
+    assert _search(client, '"OR (') == []
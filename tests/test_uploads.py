@@ -0,0 +1,77 @@
+from io import BytesIO
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client
+from django.utils import timezone
+from PIL import Image
+
+from blog.models import Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _upload(width, height, name="photo.png"):
+    buffer = BytesIO()
+    Image.new("RGB", (width, height)).save(buffer, format="PNG")
+    return SimpleUploadedFile(name, buffer.getvalue(), "image/png")
+
+
+def _create_post(client, category, image):
+    return client.post("/posts/create/", {
+        "title": "Заголовок",
+        "text": "Текст",
+        "pub_date": timezone.now().strftime("%Y-%m-%d %H:%M"),
+        "category": category.pk,
+        "image": image,
+    })
+
+
+def test_image_within_limits_is_saved(user_client, published_category):
+    response = _create_post(user_client, published_category, _upload(60, 40))
+    assert response.status_code == 302
+    assert Post.objects.get().image.width == 60
+
+
+@pytest.mark.parametrize(
+    "setting, limit, error",
+    [
+        ("IMAGE_UPLOAD_MAX_BYTES", 50, "Размер файла больше"),
+        ("IMAGE_UPLOAD_MAX_PIXELS", 50 * 50, "Изображение больше"),
+    ],
+    ids=["bytes", "pixels"],
+)
+def test_oversize_images_are_rejected(
+        settings, user_client, published_category, setting, limit, error):
+    setattr(settings, setting, limit)
+    response = _create_post(user_client, published_category, _upload(60, 60))
+    assert response.status_code == 200
+    assert error in response.context["form"].errors["image"][0], (
+        "Убедитесь, что слишком большие изображения отклоняются"
+        " с ошибкой в форме."
+    )
+    assert not Post.objects.exists()
+
+
+@pytest.mark.parametrize(
+    "content", [b"P6\n10", b"II*\x00\x08\x00\x00\x00\x01\x00"],
+    ids=["ppm", "tiff"],
+)
+def test_truncated_headers_are_form_errors(
+        user_client, published_category, content):
+    image = SimpleUploadedFile("broken.ppm", content, "image/x-portable")
+    response = _create_post(user_client, published_category, image)
+    assert response.status_code == 200, (
+        "Убедитесь, что файл с повреждённым заголовком отклоняется"
+        " ошибкой формы, а не ошибкой сервера."
+    )
+    assert response.context["form"].errors["image"]
+    assert not Post.objects.exists()
+
+
+def test_image_upload_views_check_csrf(user, published_category):
+    client = Client(enforce_csrf_checks=True)
+    client.force_login(user)
+    response = _create_post(client, published_category, _upload(60, 40))
+    assert response.status_code == 403
+    assert not Post.objects.exists()